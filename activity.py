@@ -0,0 +1,86 @@
+"""Per-user daily activity and cached streaks.
+
+A day counts as active when the user completes a study session or saves a
+reflection. daily_activity keeps one row per user and active day, and
+user_streaks keeps the current and longest streak. Both are updated when the
+activity is recorded, so reading a streak is a single primary-key lookup.
+"""
+import datetime
+
+from db import get_db_connection
+
+
+def _today():
+    # Days are UTC dates, like the CURRENT_TIMESTAMP values stored elsewhere
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def compute_streaks(days):
+    """Current and longest run of consecutive days, plus the last day, for sorted ISO dates."""
+    current = longest = 0
+    previous = None
+    for day in days:
+        date = datetime.date.fromisoformat(day)
+        current = current + 1 if previous is not None and (date - previous).days == 1 else 1
+        longest = max(longest, current)
+        previous = date
+    return current, longest, days[-1] if days else None
+
+
+def _save_streaks(cursor, user_id, current, longest, last_day):
+    cursor.execute('''
+    INSERT OR REPLACE INTO user_streaks (user_id, current_streak, longest_streak, last_day)
+    VALUES (?, ?, ?, ?)
+    ''', (user_id, current, longest, last_day))
+
+
+def recompute_streaks(cursor, user_id):
+    """Rebuild a user's streaks from all of their active days."""
+    cursor.execute("SELECT day FROM daily_activity WHERE user_id = ? ORDER BY day", (user_id,))
+    current, longest, last_day = compute_streaks([row[0] for row in cursor.fetchall()])
+    if last_day is not None:
+        _save_streaks(cursor, user_id, current, longest, last_day)
+
+
+def record_activity(cursor, user_id, day=None):
+    """Mark a day (today by default) as active and update the user's streaks."""
+    day = day or _today()
+    cursor.execute("INSERT OR IGNORE INTO daily_activity (user_id, day) VALUES (?, ?)", (user_id, day.isoformat()))
+    if cursor.rowcount == 0:
+        # Already active that day, so the streaks are unchanged
+        return
+
+    cursor.execute('''
+    SELECT current_streak, longest_streak, last_day FROM user_streaks WHERE user_id = ?
+    ''', (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        _save_streaks(cursor, user_id, 1, 1, day.isoformat())
+        return
+
+    current, longest, last_day = row
+    gap = (day - datetime.date.fromisoformat(last_day)).days
+    if gap < 0:
+        # An earlier day arrived late, which only happens when backfilling
+        recompute_streaks(cursor, user_id)
+        return
+    current = current + 1 if gap == 1 else 1
+    _save_streaks(cursor, user_id, current, max(longest, current), day.isoformat())
+
+
+def get_streaks(user_id):
+    """The user's current and longest streak in days."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT current_streak, longest_streak, last_day FROM user_streaks WHERE user_id = ?
+        ''', (user_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return 0, 0
+
+    current, longest, last_day = row
+    # The streak is broken once a whole day passes without activity
+    if (_today() - datetime.date.fromisoformat(last_day)).days > 1:
+        current = 0
+    return current, longest
@@ -0,0 +1,184 @@
+"""Gemini calls used to grade code submissions and classify reflections."""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from code_runner import has_runner_errors, run_test_cases
+from config import (
+    GEMINI_API_KEY, GEMINI_MAX_CONCURRENCY, GEMINI_MODEL, GEMINI_TIMEOUT_SECONDS,
+    REFLECTION_CONFIDENCE_THRESHOLD
+)
+from feedback_cache import feedback_cache_key, get_cached_feedback, store_feedback
+from reflection_classifier import classify_reflection_locally, record_reflection_route
+
+logger = logging.getLogger(__name__)
+
+_client_lock = threading.Lock()
+_client = None
+# Bounds the Gemini calls in flight across every session of this process
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+def get_client():
+    """Return the process-wide Gemini client, creating it on first use.
+    
+    One client is shared by every session and thread, so its HTTP connections
+    stay open between calls instead of paying a new TLS handshake each time.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google import genai
+                from google.genai import types
+                
+                if not GEMINI_API_KEY:
+                    raise RuntimeError("GEMINI_API_KEY is not set in the environment or Streamlit secrets")
+                _client = genai.Client(
+                    api_key=GEMINI_API_KEY,
+                    http_options=types.HttpOptions(timeout=int(GEMINI_TIMEOUT_SECONDS * 1000))
+                )
+    return _client
+
+@contextmanager
+def gemini_slot():
+    """Hold one of the limited Gemini call slots for the duration of a call."""
+    if not _gemini_slots.acquire(timeout=GEMINI_TIMEOUT_SECONDS):
+        raise TimeoutError("Too many Gemini requests in progress, please try again")
+    try:
+        yield
+    finally:
+        _gemini_slots.release()
+
+def _code_feedback_chunks(user_code, exercise):
+    """Yield the feedback for a submission; failures raise instead of being yielded."""
+    # Run the test cases in the isolated worker pool
+    test_results = run_test_cases(user_code, exercise)
+    
+    # Equivalent submissions with the same test results share feedback
+    cache_key = feedback_cache_key(exercise, user_code, test_results)
+    cached = get_cached_feedback(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    # Construct the prompt for Gemini
+    prompt = f"""
+    Code Exercise: {exercise['description']}
+    
+    User's Code:
+    ```python
+    {user_code}
+    ```
+    
+    Test Results:
+    ```python
+    {json.dumps(test_results, indent=2)}
+    ```
+    
+    Please evaluate the code and provide feedback in the following format:
+    1. Correctness: [Yes/No/Partial] - Based on test cases
+    2. Test Cases: Summarize which tests passed/failed
+    3. Code Quality: Evaluate style, efficiency, and best practices
+    4. Suggestions: Provide specific improvements if needed
+    5. Explanation: Brief explanation of any issues found
+    
+    Keep the feedback constructive and educational.
+    ONLY RETURN THE ABOVE FOR THIS CODE. NOT FOR ANY CODE BEFORE.
+    """
+    
+    # Stream the response from Gemini
+    chunks = []
+    with gemini_slot():
+        started = time.monotonic()
+        for chunk in get_client().models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt
+        ):
+            if not chunk.text:
+                continue
+            if not chunks:
+                logger.info("Code feedback time to first token: %.2fs", time.monotonic() - started)
+            chunks.append(chunk.text)
+            yield chunk.text
+    
+    if not chunks:
+        raise RuntimeError("No response generated")
+    # Feedback on a busy or overloaded runner's errors would be wrong for the next identical submission
+    if not has_runner_errors(test_results):
+        store_feedback(cache_key, "".join(chunks))
+
+def evaluate_code_with_gemini(user_code, exercise, stream=False):
+    """Evaluate user's code submission using Gemini.
+    
+    With stream=True this returns an iterator over the feedback as it arrives,
+    which raises if the evaluation fails part way. Otherwise failures come
+    back as an "Error evaluating code" message.
+    """
+    if stream:
+        return _code_feedback_chunks(user_code, exercise)
+    try:
+        return "".join(_code_feedback_chunks(user_code, exercise))
+    except Exception as e:
+        return f"Error evaluating code: {str(e)}"
+
+def request_reflection_analysis(reflection_text):
+    """Ask Gemini whether the student found the content easy or hard.
+    
+    Raises instead of falling back: ValueError if the answer is empty or not
+    an easy/hard classification (json.JSONDecodeError if it is not JSON), or
+    whatever the Gemini call itself raised.
+    """
+    prompt = f"""
+    Analyze this student's reflection on a coding exercise and determine if they found it easy or hard.
+    Consider words and phrases that indicate difficulty level, understanding, and confidence.
+    
+    Reflection:
+    {reflection_text}
+    
+    Classify as either 'easy' or 'hard' and explain why in JSON format:
+    {{
+        "classification": "easy/hard",
+        "confidence": 0-1,
+        "reasoning": "brief explanation"
+    }}
+    """
+    
+    with gemini_slot():
+        response = get_client().models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt
+        )
+    
+    if not response.text:
+        raise ValueError("Unable to analyze reflection")
+    result = json.loads(response.text)
+    # Validate the response format
+    if not isinstance(result, dict) or result.get("classification") not in ["easy", "hard"]:
+        raise ValueError("Invalid response format")
+    return result
+
+def analyze_reflection_with_gemini(reflection_text):
+    """Analyze user's reflection to determine if they found the content easy or hard."""
+    try:
+        return request_reflection_analysis(reflection_text)
+    except json.JSONDecodeError:
+        # If response is not valid JSON, fall back to the local classifier
+        return classify_reflection_locally(reflection_text)
+    except Exception as e:
+        return {"classification": "medium", "confidence": 0.5, "reasoning": str(e)}
+
+def analyze_reflection(reflection_text):
+    """Classify a reflection locally and ask Gemini only when the local result is unsure."""
+    local_result = classify_reflection_locally(reflection_text)
+    if local_result["confidence"] >= REFLECTION_CONFIDENCE_THRESHOLD:
+        record_reflection_route(escalated=False)
+        return local_result
+    
+    record_reflection_route(escalated=True)
+    result = analyze_reflection_with_gemini(reflection_text)
+    # Keep the local answer if Gemini could not classify the reflection either
+    if result.get("classification") not in ("easy", "hard"):
+        return local_result
+    return result
@@ -0,0 +1,275 @@
+"""Re-run reflection analysis over stored reflections.
+
+Reflections saved while Gemini was unavailable, or before a prompt change,
+keep whatever classification they got at the time. This command walks the
+reflections table in id order, one batch at a time, re-classifies each
+reflection and writes the results back per batch. Progress is checkpointed
+after every batch so an interrupted run resumes where it stopped.
+
+A reflection Gemini cannot classify, even after retries, is left unchanged
+and the run moves on. Its id is recorded in the checkpoint and, once the run
+finishes, in a failed file that --retry-failed works through on its own.
+
+    python backfill_reflections.py --classification medium
+    python backfill_reflections.py --since 2024-01-01 --until 2024-02-01 --force-gemini
+    python backfill_reflections.py --retry-failed --force-gemini
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ai import request_reflection_analysis
+from catalog import IN_CLAUSE_LIMIT
+from config import REFLECTION_CONFIDENCE_THRESHOLD
+from db import ensure_schema, get_db_connection
+from reflection_classifier import classify_reflection_locally
+
+DEFAULT_CHECKPOINT = ".reflection_backfill.json"
+DEFAULT_FAILED_FILE = ".reflection_backfill_failed.json"
+DEFAULT_RETRIES = 2
+RETRY_DELAY_SECONDS = 1.0
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` calls per second with bursts up to ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _filters(args):
+    clauses, params = [], []
+    if args.since:
+        clauses.append("created_at >= ?")
+        params.append(args.since)
+    if args.until:
+        clauses.append("created_at < ?")
+        params.append(args.until)
+    if args.classification:
+        clauses.append("json_extract(ai_feedback, '$.reflection_analysis.classification') IS ?")
+        params.append(args.classification)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def fetch_batch(after_id, args):
+    """Next batch of matching reflections with an id above after_id."""
+    where, params = _filters(args)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+        SELECT id, reflection_text, ai_feedback FROM reflections
+        WHERE id > ? AND reflection_text IS NOT NULL{where}
+        ORDER BY id
+        LIMIT ?
+        ''', (after_id, *params, args.batch_size))
+        return cursor.fetchall()
+
+
+def fetch_rows(ids):
+    """The reflections with the given ids, in id order."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+        SELECT id, reflection_text, ai_feedback FROM reflections
+        WHERE id IN ({",".join("?" * len(ids))}) AND reflection_text IS NOT NULL
+        ORDER BY id
+        ''', ids)
+        return cursor.fetchall()
+
+
+def analyze(reflection_text, limiter, force_gemini, retries=DEFAULT_RETRIES):
+    """Classify locally first, like the app does, and rate limit Gemini calls.
+
+    Returns None if Gemini fails on every attempt. Unlike the app, this never
+    stores a fallback answer in place of the one it was asked to compute.
+    """
+    if not force_gemini:
+        result = classify_reflection_locally(reflection_text)
+        if result["confidence"] >= REFLECTION_CONFIDENCE_THRESHOLD:
+            return result
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(RETRY_DELAY_SECONDS * 2 ** (attempt - 1))
+        limiter.acquire()
+        try:
+            return request_reflection_analysis(reflection_text)
+        except Exception:
+            continue
+    return None
+
+
+def _merge_feedback(ai_feedback, analysis):
+    # Keep the stored code feedback and replace only the reflection analysis
+    try:
+        feedback = json.loads(ai_feedback) if ai_feedback else {}
+    except json.JSONDecodeError:
+        feedback = {"code_feedback": ai_feedback}
+    if not isinstance(feedback, dict):
+        feedback = {"code_feedback": feedback}
+    feedback["reflection_analysis"] = analysis
+    return json.dumps(feedback)
+
+
+def _checkpoint_filters(args):
+    return {
+        "since": args.since,
+        "until": args.until,
+        "classification": args.classification,
+        "force_gemini": args.force_gemini
+    }
+
+
+def load_checkpoint(path, args):
+    """The last id processed and the ids that failed so far, or (0, []) for a new run."""
+    if not os.path.exists(path):
+        return 0, []
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["filters"] != _checkpoint_filters(args):
+        raise SystemExit(f"{path} was written with different filters; pass --restart to start over")
+    return checkpoint["last_id"], checkpoint.get("failed", [])
+
+
+def save_checkpoint(path, args, last_id, updated, failed):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"filters": _checkpoint_filters(args), "last_id": last_id, "updated": updated,
+                   "failed": failed}, f)
+    os.replace(tmp_path, path)
+
+
+def load_failed(path):
+    """Ids of reflections earlier runs could not analyze."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_failed(path, failed_ids):
+    if not failed_ids:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(sorted(failed_ids), f)
+    os.replace(tmp_path, path)
+
+
+def _process(rows, executor, limiter, args):
+    """Analyze and write back one batch; returns the ids Gemini could not analyze."""
+    analyses = list(executor.map(
+        lambda row: analyze(row[1], limiter, args.force_gemini, args.retries), rows
+    ))
+    # Failed reflections keep their stored feedback
+    updates = [
+        (_merge_feedback(row[2], analysis), row[0])
+        for row, analysis in zip(rows, analyses) if analysis is not None
+    ]
+    if updates and not args.dry_run:
+        with get_db_connection() as conn:
+            conn.executemany("UPDATE reflections SET ai_feedback = ? WHERE id = ?", updates)
+    return [row[0] for row, analysis in zip(rows, analyses) if analysis is None]
+
+
+def retry_failed(args, executor, limiter):
+    """Analyze only the reflections listed in the failed file."""
+    remaining = set(load_failed(args.failed_file))
+    failed_ids = sorted(remaining)
+    batch_size = min(args.batch_size, IN_CLAUSE_LIMIT)
+    updated = 0
+    for start in range(0, len(failed_ids), batch_size):
+        batch = failed_ids[start:start + batch_size]
+        rows = fetch_rows(batch)
+        still_failed = set(_process(rows, executor, limiter, args))
+        # Ids whose reflection was deleted are dropped along with the processed ones
+        remaining.difference_update(batch)
+        remaining.update(still_failed)
+        updated += len(rows) - len(still_failed)
+        if not args.dry_run:
+            save_failed(args.failed_file, remaining)
+        print(f"Retried {start + len(batch)} of {len(failed_ids)} failed reflections")
+    return updated, sorted(remaining)
+
+
+def backfill(args, executor, limiter):
+    """Walk the matching reflections from the checkpoint to the end."""
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    last_id, failed = load_checkpoint(args.checkpoint, args)
+    updated = 0
+    while True:
+        rows = fetch_batch(last_id, args)
+        if not rows:
+            break
+        batch_failed = _process(rows, executor, limiter, args)
+        failed += batch_failed
+        last_id = rows[-1][0]
+        updated += len(rows) - len(batch_failed)
+        if not args.dry_run:
+            save_checkpoint(args.checkpoint, args, last_id, updated, failed)
+        print(f"Processed {updated} reflections (last id {last_id}, {len(failed)} failed)")
+
+    if not args.dry_run:
+        # Failures are kept for --retry-failed; a finished run starts from the beginning next time
+        save_failed(args.failed_file, set(load_failed(args.failed_file)) | set(failed))
+        if os.path.exists(args.checkpoint):
+            os.remove(args.checkpoint)
+    return updated, failed
+
+
+def run(args):
+    ensure_schema()
+    limiter = RateLimiter(args.rate, burst=args.concurrency)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        if args.retry_failed:
+            updated, failed = retry_failed(args, executor, limiter)
+        else:
+            updated, failed = backfill(args, executor, limiter)
+    print(f"Done: {updated} reflections {'checked' if args.dry_run else 'updated'}")
+    if failed:
+        print(f"{len(failed)} reflections could not be analyzed and were left unchanged; "
+              f"re-run with --retry-failed to try them again")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run analysis on stored reflections.")
+    parser.add_argument("--since", help="Only reflections created on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Only reflections created before this date (YYYY-MM-DD)")
+    parser.add_argument("--classification", help="Only reflections currently classified as this, e.g. medium")
+    parser.add_argument("--force-gemini", action="store_true", help="Send every reflection to Gemini")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Analyses running at once")
+    parser.add_argument("--rate", type=float, default=2.0, help="Gemini calls per second")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Retries of a failed Gemini call")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--failed-file", default=DEFAULT_FAILED_FILE, help="Ids of reflections that failed")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Only re-analyze the reflections in the failed file; the filters are ignored")
+    parser.add_argument("--dry-run", action="store_true", help="Analyze without writing results")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
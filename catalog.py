@@ -0,0 +1,318 @@
+"""Course catalog content and its process-wide in-memory cache.
+
+Challenge content (intro text, quiz questions, coding exercises and their test
+cases) used to live in one JSON blob in challenges.quiz_data. It is now spread
+across the questions, coding_exercises, test_cases and code_snippets tables so
+pages can read a single field without decoding the whole challenge.
+
+Courses and challenges are static between catalog imports, so get_catalog()
+keeps one copy per process, shared by every session. It is served from a
+memory-mapped snapshot file (see catalog_snapshot.py) that decodes challenges
+on access. Imports call bump_catalog_version() and the next get_catalog()
+reloads. Besides the version counter, app_meta holds a random catalog
+generation that every bump replaces, so a recreated or restored database is
+never mistaken for the one a cached catalog or snapshot was built from.
+"""
+import json
+import threading
+from bisect import bisect_right
+
+from db import get_db_connection
+
+# Stays well under SQLite's limit on bound parameters per statement
+IN_CLAUSE_LIMIT = 500
+
+
+def write_challenges_content(cursor, contents):
+    """Store the content of many challenges with one executemany per table.
+
+    ``contents`` is a list of (challenge_id, content) pairs, where content has
+    the same shape as the old quiz_data blob: intro_text, code_snippets,
+    questions, coding_exercises and conclusion_text. The challenges must not
+    have content rows yet; delete_challenges_content() clears them.
+    """
+    cursor.executemany('''
+    UPDATE challenges SET intro_text = ?, conclusion_text = ? WHERE id = ?
+    ''', [(content.get("intro_text", ""), content.get("conclusion_text", ""), challenge_id)
+          for challenge_id, content in contents])
+
+    cursor.executemany('''
+    INSERT INTO code_snippets (challenge_id, position, title, code)
+    VALUES (?, ?, ?, ?)
+    ''', [(challenge_id, position, snippet.get("title"), snippet.get("code"))
+          for challenge_id, content in contents
+          for position, snippet in enumerate(content.get("code_snippets", []))])
+
+    cursor.executemany('''
+    INSERT INTO questions (challenge_id, position, question, options, correct, difficulty)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(
+        challenge_id,
+        position,
+        question["question"],
+        json.dumps(question.get("options", [])),
+        question.get("correct"),
+        question.get("difficulty")
+    ) for challenge_id, content in contents
+      for position, question in enumerate(content.get("questions", []))])
+
+    exercises = [
+        (challenge_id, position, exercise)
+        for challenge_id, content in contents
+        for position, exercise in enumerate(content.get("coding_exercises", []))
+    ]
+    if not exercises:
+        return
+    cursor.executemany('''
+    INSERT INTO coding_exercises (challenge_id, position, title, description, difficulty, starter_code, hints)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(
+        challenge_id,
+        position,
+        exercise["title"],
+        exercise.get("description"),
+        exercise.get("difficulty"),
+        exercise.get("starter_code"),
+        json.dumps(exercise.get("hints", []))
+    ) for challenge_id, position, exercise in exercises])
+
+    # executemany() gives no lastrowid per row, so read the new exercise ids back
+    challenge_ids = sorted({challenge_id for challenge_id, _, _ in exercises})
+    exercise_ids = {}
+    for start in range(0, len(challenge_ids), IN_CLAUSE_LIMIT):
+        chunk = challenge_ids[start:start + IN_CLAUSE_LIMIT]
+        cursor.execute(f'''
+        SELECT id, challenge_id, position FROM coding_exercises
+        WHERE challenge_id IN ({",".join("?" * len(chunk))}) ORDER BY id
+        ''', chunk)
+        for exercise_id, challenge_id, position in cursor.fetchall():
+            exercise_ids[(challenge_id, position)] = exercise_id
+
+    cursor.executemany('''
+    INSERT INTO test_cases (exercise_id, challenge_id, position, input, expected)
+    VALUES (?, ?, ?, ?, ?)
+    ''', [(
+        exercise_ids[(challenge_id, position)],
+        challenge_id,
+        test_position,
+        json.dumps(test.get("input")),
+        json.dumps(test.get("expected"))
+    ) for challenge_id, position, exercise in exercises
+      for test_position, test in enumerate(exercise.get("test_cases", []))])
+
+
+def delete_challenges_content(cursor, challenge_ids):
+    """Remove the snippets, questions, exercises and test cases of these challenges."""
+    rows = [(challenge_id,) for challenge_id in challenge_ids]
+    for table in ("test_cases", "coding_exercises", "questions", "code_snippets"):
+        cursor.executemany(f"DELETE FROM {table} WHERE challenge_id = ?", rows)
+
+
+def bump_catalog_version(cursor):
+    """Mark the catalog as changed so every process reloads its cached copy."""
+    cursor.execute('''
+    UPDATE app_meta SET value = value + 1 WHERE key = 'catalog_version'
+    ''')
+    cursor.execute("UPDATE app_meta SET value = random() WHERE key = 'catalog_generation'")
+
+
+def get_catalog_version(cursor):
+    """The stored (catalog_version, catalog_generation) pair identifying the catalog."""
+    cursor.execute('''
+    SELECT key, value FROM app_meta WHERE key IN ('catalog_version', 'catalog_generation')
+    ''')
+    values = dict(cursor.fetchall())
+    return values["catalog_version"], values["catalog_generation"]
+
+
+class Course:
+    __slots__ = ("id", "name", "category", "total_chapters", "total_lectures",
+                 "difficulty_level", "description", "challenges")
+
+    def __init__(self, id, name, category, total_chapters, total_lectures, difficulty_level, description):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.total_chapters = total_chapters
+        self.total_lectures = total_lectures
+        self.difficulty_level = difficulty_level
+        self.description = description
+        # Challenges ordered by level, filled in by load_catalog()
+        self.challenges = []
+
+
+class Challenge:
+    __slots__ = ("id", "course_id", "level", "title", "description", "video_url", "intro_text",
+                 "conclusion_text", "code_snippets", "questions", "coding_exercises", "difficulty")
+
+    def __init__(self, id, course_id, level, title, description, video_url, intro_text, conclusion_text):
+        self.id = id
+        self.course_id = course_id
+        self.level = level
+        self.title = title
+        self.description = description
+        self.video_url = video_url
+        self.intro_text = intro_text or ""
+        self.conclusion_text = conclusion_text or ""
+        self.code_snippets = []
+        self.questions = []
+        self.coding_exercises = []
+        # Difficulty of the first rated coding exercise, used for adaptive levels
+        self.difficulty = None
+
+    def topics(self, limit=5):
+        """Titles of the code snippets, or the quiz questions if there are none."""
+        if self.code_snippets:
+            return [snippet["title"] or "Topic" for snippet in self.code_snippets[:limit]]
+        return [question["question"] or "Quiz" for question in self.questions[:limit]]
+
+
+class DifficultyLadder:
+    """A course's levels grouped by difficulty, for adaptive level selection."""
+    __slots__ = ("levels", "challenge_ids")
+
+    def __init__(self, challenges):
+        # Sorted level numbers per challenge difficulty
+        self.levels = {}
+        # Challenge ids per coding exercise difficulty, one entry per exercise
+        self.challenge_ids = {}
+        for challenge in sorted(challenges, key=lambda c: c.level):
+            if challenge.difficulty:
+                self.levels.setdefault(challenge.difficulty, []).append(challenge.level)
+            for exercise in challenge.coding_exercises:
+                if exercise.get("difficulty"):
+                    self.challenge_ids.setdefault(exercise["difficulty"], []).append(challenge.id)
+
+    def next_level(self, current_level, difficulties):
+        """Lowest level above current_level whose difficulty is one of difficulties."""
+        best = None
+        for difficulty in difficulties:
+            levels = self.levels.get(difficulty)
+            if not levels:
+                continue
+            index = bisect_right(levels, current_level)
+            if index < len(levels) and (best is None or levels[index] < best):
+                best = levels[index]
+        return best
+
+    def challenges_with(self, difficulty):
+        return self.challenge_ids.get(difficulty, [])
+
+
+class Catalog:
+    """Decoded courses and challenges indexed for constant-time lookups."""
+
+    def __init__(self, version, generation, courses, challenges):
+        self.version = version
+        self.generation = generation
+        self.courses = courses
+        self.courses_by_id = {course.id: course for course in courses}
+        self.challenges_by_id = {challenge.id: challenge for challenge in challenges}
+        self.challenges_by_level = {(challenge.course_id, challenge.level): challenge for challenge in challenges}
+        self._ladders = {}
+
+    def get_course(self, course_id):
+        return self.courses_by_id.get(course_id)
+
+    def get_challenge(self, challenge_id):
+        return self.challenges_by_id.get(challenge_id)
+
+    def get_challenge_by_level(self, course_id, level):
+        return self.challenges_by_level.get((course_id, level))
+
+    def get_course_challenges(self, course_id):
+        course = self.courses_by_id.get(course_id)
+        return course.challenges if course else []
+
+    def get_level_count(self, course_id):
+        # Levels are unique within a course
+        return len(self.get_course_challenges(course_id))
+
+    def get_difficulty_ladder(self, course_id):
+        """The course's difficulty ladder, built on first use and kept with this catalog."""
+        ladder = self._ladders.get(course_id)
+        if ladder is None:
+            ladder = self._ladders[course_id] = DifficultyLadder(self.get_course_challenges(course_id))
+        return ladder
+
+
+def load_catalog(cursor, version, generation):
+    """Read the whole catalog with one query per table."""
+    cursor.execute('''
+    SELECT id, name, category, total_chapters, total_lectures, difficulty_level, description
+    FROM courses ORDER BY id
+    ''')
+    courses = [Course(*row) for row in cursor.fetchall()]
+    courses_by_id = {course.id: course for course in courses}
+
+    cursor.execute('''
+    SELECT id, course_id, level, title, description, video_url, intro_text, conclusion_text
+    FROM challenges ORDER BY course_id, level
+    ''')
+    challenges = [Challenge(*row) for row in cursor.fetchall()]
+    challenges_by_id = {challenge.id: challenge for challenge in challenges}
+    for challenge in challenges:
+        if challenge.course_id in courses_by_id:
+            courses_by_id[challenge.course_id].challenges.append(challenge)
+
+    cursor.execute("SELECT challenge_id, title, code FROM code_snippets ORDER BY challenge_id, position")
+    for challenge_id, title, code in cursor.fetchall():
+        if challenge_id in challenges_by_id:
+            challenges_by_id[challenge_id].code_snippets.append({"title": title, "code": code})
+
+    cursor.execute('''
+    SELECT challenge_id, question, options, correct, difficulty
+    FROM questions ORDER BY challenge_id, position
+    ''')
+    for challenge_id, question, options, correct, difficulty in cursor.fetchall():
+        if challenge_id in challenges_by_id:
+            challenges_by_id[challenge_id].questions.append(
+                {"question": question, "options": json.loads(options), "correct": correct, "difficulty": difficulty}
+            )
+
+    cursor.execute("SELECT exercise_id, input, expected FROM test_cases ORDER BY challenge_id, exercise_id, position")
+    tests_by_exercise = {}
+    for exercise_id, test_input, expected in cursor.fetchall():
+        tests_by_exercise.setdefault(exercise_id, []).append(
+            {"input": json.loads(test_input), "expected": json.loads(expected)}
+        )
+
+    cursor.execute('''
+    SELECT id, challenge_id, title, description, difficulty, starter_code, hints
+    FROM coding_exercises ORDER BY challenge_id, position
+    ''')
+    for exercise_id, challenge_id, title, description, difficulty, starter_code, hints in cursor.fetchall():
+        challenge = challenges_by_id.get(challenge_id)
+        if challenge is None:
+            continue
+        challenge.coding_exercises.append({
+            "title": title,
+            "description": description,
+            "difficulty": difficulty,
+            "starter_code": starter_code,
+            "test_cases": tests_by_exercise.get(exercise_id, []),
+            "hints": json.loads(hints) if hints else []
+        })
+        if difficulty and challenge.difficulty is None:
+            challenge.difficulty = difficulty
+
+    return Catalog(version, generation, courses, challenges)
+
+
+_catalog_lock = threading.Lock()
+_catalog = None
+
+
+def get_catalog():
+    """Return the shared catalog, reloading it if the stored version has moved."""
+    global _catalog
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        version, generation = get_catalog_version(cursor)
+        if _catalog is not None and (_catalog.version, _catalog.generation) == (version, generation):
+            return _catalog
+        with _catalog_lock:
+            if _catalog is None or (_catalog.version, _catalog.generation) != (version, generation):
+                from catalog_snapshot import load_snapshot_catalog
+                _catalog = load_snapshot_catalog(cursor, version, generation)
+            return _catalog
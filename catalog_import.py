@@ -0,0 +1,327 @@
+"""Import a course catalog file (courses.json) into the database.
+
+The file is read incrementally and decoded one course at a time, so memory
+stays bounded by the largest course rather than the whole catalog. Courses are
+matched by name and challenges by (course, level). Both are upserted in
+batches with executemany, and a content hash stored on each row lets re-runs
+skip every record that has not changed. Records that are no longer in the file
+are left in place, since users' progress and reflections point at them.
+
+    python catalog_import.py courses.json
+    python catalog_import.py big_catalog.json --batch-size 5000 --force
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from catalog import IN_CLAUSE_LIMIT, bump_catalog_version, delete_challenges_content, write_challenges_content
+from db import ensure_schema, get_db_connection
+
+DEFAULT_BATCH_SIZE = 2000
+READ_SIZE = 1 << 20
+COURSE_FIELDS = ("name", "category", "total_chapters", "total_lectures", "difficulty_level", "description")
+
+_decoder = json.JSONDecoder()
+
+
+def _whitespace_end(buffer, pos):
+    while pos < len(buffer) and buffer[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def _next_token(f, buffer, pos):
+    """Skip whitespace from pos, reading more of the file until a character shows up.
+
+    Returns the buffer and the position of that character, which is the end of
+    the buffer at the end of the file.
+    """
+    while True:
+        pos = _whitespace_end(buffer, pos)
+        if pos < len(buffer):
+            return buffer, pos
+        more = f.read(READ_SIZE)
+        if not more:
+            return buffer, pos
+        buffer += more
+
+
+def _decode_value(f, buffer, pos):
+    """Decode the JSON value at pos, reading more of the file until it is complete."""
+    while True:
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            more = f.read(max(READ_SIZE, len(buffer) - pos))
+            if not more:
+                raise
+            buffer += more
+            continue
+        # A number at the end of the buffer may go on in the next chunk
+        if end < len(buffer):
+            return value, buffer, end
+        more = f.read(READ_SIZE)
+        if not more:
+            return value, buffer, end
+        buffer += more
+
+
+def _courses_start(f):
+    """Read up to the opening bracket of the courses array; returns the buffer and its position."""
+    buffer, pos = _next_token(f, f.read(READ_SIZE), 0)
+    if buffer[pos:pos + 1] == "[":
+        return buffer, pos
+    if buffer[pos:pos + 1] != "{":
+        raise ValueError("Catalog file must hold a list of courses")
+
+    # Walk the top-level keys only, so a "courses" key nested in another value
+    # is skipped along with that value
+    buffer, pos = _next_token(f, buffer, pos + 1)
+    while buffer[pos:pos + 1] == '"':
+        key, buffer, pos = _decode_value(f, buffer, pos)
+        buffer, pos = _next_token(f, buffer, pos)
+        if buffer[pos:pos + 1] != ":":
+            raise ValueError(f"Catalog file has no value for key {key!r}")
+        buffer, pos = _next_token(f, buffer, pos + 1)
+        if key == "courses":
+            if buffer[pos:pos + 1] != "[":
+                raise ValueError("The \"courses\" value of the catalog file must be a list")
+            return buffer, pos
+        _, buffer, pos = _decode_value(f, buffer, pos)
+        buffer, pos = _next_token(f, buffer, pos)
+        if buffer[pos:pos + 1] == ",":
+            buffer, pos = _next_token(f, buffer, pos + 1)
+    raise ValueError("Catalog file has no \"courses\" list")
+
+
+def iter_courses(f):
+    """Yield the course objects of a catalog file one at a time.
+
+    Accepts the {"courses": [...]} layout of courses.json or a bare list.
+    """
+    buffer, pos = _courses_start(f)
+    pos += 1
+
+    eof = False
+    while True:
+        pos = _whitespace_end(buffer, pos)
+        if pos < len(buffer) and buffer[pos] == ",":
+            pos = _whitespace_end(buffer, pos + 1)
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            course, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The next course is not fully read yet; read at least as much
+            # again so a huge course is not re-decoded once per chunk
+            buffer = buffer[pos:]
+            pos = 0
+            more = f.read(max(READ_SIZE, len(buffer)))
+            eof = not more
+            buffer += more
+            continue
+        yield course
+        pos = end
+        if pos > READ_SIZE:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def content_hash(record):
+    """Stable hash of a JSON-serializable record."""
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def challenge_content(video):
+    """The challenge content dict stored for one video of courses.json."""
+    return {
+        "intro_text": video.get("intro_text", ""),
+        "code_snippets": video.get("code_snippets", []),
+        "questions": video.get("quizzes", []),
+        "coding_exercises": video.get("coding_exercises", []),
+        "conclusion_text": video.get("conclusion_text", "")
+    }
+
+
+def _chunks(values, size=IN_CLAUSE_LIMIT):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class ImportStats:
+    __slots__ = ("courses", "courses_changed", "challenges", "challenges_changed")
+
+    def __init__(self):
+        self.courses = self.courses_changed = 0
+        self.challenges = self.challenges_changed = 0
+
+    def __str__(self):
+        return (f"{self.courses} courses ({self.courses_changed} new or changed), "
+                f"{self.challenges} challenges ({self.challenges_changed} new or changed)")
+
+
+def _write_batch(cursor, courses, stats, force=False):
+    """Upsert one batch of (course row, course hash, videos) and their challenges."""
+    cursor.execute("SELECT name, content_hash FROM courses WHERE name IN (%s)" % ",".join("?" * len(courses)),
+                   [row[0] for row, _, _ in courses])
+    stored_course_hashes = dict(cursor.fetchall())
+    changed_courses = [
+        row + (course_hash,) for row, course_hash, _ in courses
+        if force or stored_course_hashes.get(row[0]) != course_hash
+    ]
+    cursor.executemany('''
+    INSERT INTO courses (name, category, total_chapters, total_lectures, difficulty_level, description, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (name) DO UPDATE SET
+        category = excluded.category,
+        total_chapters = excluded.total_chapters,
+        total_lectures = excluded.total_lectures,
+        difficulty_level = excluded.difficulty_level,
+        description = excluded.description,
+        content_hash = excluded.content_hash
+    ''', changed_courses)
+    stats.courses += len(courses)
+    stats.courses_changed += len(changed_courses)
+
+    cursor.execute("SELECT name, id FROM courses WHERE name IN (%s)" % ",".join("?" * len(courses)),
+                   [row[0] for row, _, _ in courses])
+    course_ids = dict(cursor.fetchall())
+
+    # Stored hashes of every challenge in the batch's courses
+    stored = {}
+    for chunk in _chunks(list(course_ids.values())):
+        cursor.execute('''
+        SELECT course_id, level, content_hash FROM challenges WHERE course_id IN (%s)
+        ''' % ",".join("?" * len(chunk)), chunk)
+        for course_id, level, stored_hash in cursor.fetchall():
+            stored[(course_id, level)] = stored_hash
+
+    changed = []
+    for row, _, videos in courses:
+        course_id = course_ids[row[0]]
+        for level, video in enumerate(videos, start=1):
+            video_hash = content_hash(video)
+            stats.challenges += 1
+            if force or stored.get((course_id, level)) != video_hash:
+                changed.append((course_id, level, video, video_hash))
+    if not changed:
+        return
+
+    cursor.executemany('''
+    INSERT INTO challenges (course_id, level, title, description, video_url, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (course_id, level) DO UPDATE SET
+        title = excluded.title,
+        description = excluded.description,
+        video_url = excluded.video_url,
+        content_hash = excluded.content_hash
+    ''', [
+        (course_id, level, video["title"], video.get("description", video["title"]), video.get("url"), video_hash)
+        for course_id, level, video, video_hash in changed
+    ])
+    stats.challenges_changed += len(changed)
+
+    # Map the changed challenges to their ids, including the ones just inserted
+    challenge_ids = {}
+    changed_course_ids = sorted({course_id for course_id, _, _, _ in changed})
+    for chunk in _chunks(changed_course_ids):
+        cursor.execute('''
+        SELECT course_id, level, id FROM challenges WHERE course_id IN (%s)
+        ''' % ",".join("?" * len(chunk)), chunk)
+        for course_id, level, challenge_id in cursor.fetchall():
+            challenge_ids[(course_id, level)] = challenge_id
+
+    contents = [
+        (challenge_ids[(course_id, level)], challenge_content(video))
+        for course_id, level, video, _ in changed
+    ]
+    delete_challenges_content(cursor, [challenge_id for challenge_id, _ in contents])
+    write_challenges_content(cursor, contents)
+
+
+def import_catalog(path, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Upsert every course and challenge in the catalog file; returns ImportStats.
+
+    Each batch of about ``batch_size`` challenges is written in its own
+    transaction, so an interrupted import keeps its finished batches and a
+    re-run skips them. ``force`` rewrites records even if their hash matches.
+    """
+    stats = ImportStats()
+    batch, batch_challenges = [], 0
+
+    def flush():
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            changed_before = stats.courses_changed + stats.challenges_changed
+            _write_batch(cursor, batch, stats, force)
+            if stats.courses_changed + stats.challenges_changed > changed_before:
+                # Cached catalogs in every process reload on their next read
+                bump_catalog_version(cursor)
+
+    with open(path, "r", encoding="utf-8") as f:
+        for course in iter_courses(f):
+            videos = course.get("videos", [])
+            row = tuple(course.get(field) for field in COURSE_FIELDS)
+            batch.append((row, content_hash(dict(zip(COURSE_FIELDS, row))), videos))
+            batch_challenges += len(videos)
+            if batch_challenges >= batch_size or len(batch) >= IN_CLAUSE_LIMIT:
+                flush()
+                batch, batch_challenges = [], 0
+        if batch:
+            flush()
+    return stats
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def import_catalog_if_changed(path, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Import the file unless this exact file content was imported before.
+
+    Returns the ImportStats, or None if the file was unchanged.
+    """
+    source = os.path.abspath(path)
+    current_hash = file_hash(path)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT file_hash FROM catalog_imports WHERE source = ?", (source,))
+        row = cursor.fetchone()
+    if row and row[0] == current_hash and not force:
+        return None
+
+    stats = import_catalog(path, batch_size=batch_size, force=force)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO catalog_imports (source, file_hash) VALUES (?, ?)
+        ON CONFLICT (source) DO UPDATE SET file_hash = excluded.file_hash, imported_at = CURRENT_TIMESTAMP
+        ''', (source, current_hash))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a course catalog file into the database.")
+    parser.add_argument("path", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "courses.json"))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Challenges written per transaction")
+    parser.add_argument("--force", action="store_true", help="Rewrite records even if they are unchanged")
+    args = parser.parse_args()
+
+    ensure_schema()
+    stats = import_catalog_if_changed(args.path, batch_size=args.batch_size, force=args.force)
+    if stats is None:
+        print("Catalog file unchanged since the last import")
+    else:
+        print(f"Imported {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Compiled, memory-mapped snapshot of the course catalog.
+
+Loading the catalog from the database decodes every challenge up front, which
+costs time and memory in each new server process as the catalog grows. A
+snapshot is the catalog for one catalog_version and catalog_generation packed
+into a single file:
+
+    header | courses (JSON) | one JSON payload per challenge | level index | id index
+
+The two indexes are fixed-size struct records, sorted so lookups are binary
+searches over the memory-mapped file. Opening a snapshot only decodes the
+header and the course list; a challenge is decoded the first time it is asked
+for and kept in a small LRU. get_catalog() opens the snapshot for the current
+catalog version and generation and builds it first if it is missing or stale.
+The version alone is not enough, as a recreated or restored database can be
+back at a version an older snapshot was built for.
+
+    python catalog_snapshot.py
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import db
+from catalog import Catalog, Challenge, Course, get_catalog_version, load_catalog
+
+MAGIC = b"FMCS"
+FORMAT_VERSION = 2
+# Decoded challenges kept per open snapshot
+CHALLENGE_CACHE_SIZE = 2048
+
+# magic, format version, catalog version, catalog generation, courses offset
+# and length, challenge count, level index offset, id index offset
+_HEADER = struct.Struct("<4sHQqQIIQQ")
+# course_id, level, challenge id, payload offset, payload length
+_LEVEL_ENTRY = struct.Struct("<IIIQI")
+# challenge id, position in the level index
+_ID_ENTRY = struct.Struct("<II")
+
+
+def snapshot_path():
+    """The snapshot file, kept next to the database it was built from."""
+    return os.path.splitext(db.DB_PATH)[0] + ".catalog"
+
+
+def write_snapshot(catalog, path=None):
+    """Write ``catalog`` to a snapshot file, replacing any existing one atomically."""
+    path = path or snapshot_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    challenges = sorted(catalog.challenges_by_id.values(), key=lambda c: (c.course_id, c.level))
+    courses = json.dumps([
+        [c.id, c.name, c.category, c.total_chapters, c.total_lectures, c.difficulty_level, c.description]
+        for c in catalog.courses
+    ]).encode("utf-8")
+
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * _HEADER.size)
+            courses_offset = f.tell()
+            f.write(courses)
+
+            level_index = []
+            for challenge in challenges:
+                payload = json.dumps([
+                    challenge.title, challenge.description, challenge.video_url, challenge.intro_text,
+                    challenge.conclusion_text, challenge.code_snippets, challenge.questions,
+                    challenge.coding_exercises
+                ], separators=(",", ":")).encode("utf-8")
+                level_index.append((challenge.course_id, challenge.level, challenge.id, f.tell(), len(payload)))
+                f.write(payload)
+
+            level_index_offset = f.tell()
+            for entry in level_index:
+                f.write(_LEVEL_ENTRY.pack(*entry))
+            id_index_offset = f.tell()
+            for position, entry in sorted(enumerate(level_index), key=lambda item: item[1][2]):
+                f.write(_ID_ENTRY.pack(entry[2], position))
+
+            f.seek(0)
+            f.write(_HEADER.pack(
+                MAGIC, FORMAT_VERSION, catalog.version, catalog.generation, courses_offset, len(courses),
+                len(level_index), level_index_offset, id_index_offset
+            ))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SnapshotCatalog(Catalog):
+    """A Catalog backed by a memory-mapped snapshot that decodes challenges on access.
+
+    Course.challenges is left empty; use get_course_challenges().
+    """
+
+    def __init__(self, version, generation, courses, buffer, count, level_index_offset, id_index_offset):
+        self.version = version
+        self.generation = generation
+        self.courses = courses
+        self.courses_by_id = {course.id: course for course in courses}
+        self._ladders = {}
+        self._buffer = buffer
+        self._count = count
+        self._level_index_offset = level_index_offset
+        self._id_index_offset = id_index_offset
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _level_entry(self, position):
+        return _LEVEL_ENTRY.unpack_from(self._buffer, self._level_index_offset + position * _LEVEL_ENTRY.size)
+
+    def _level_lower_bound(self, course_id, level):
+        # First level index position at or after (course_id, level)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._level_entry(mid)[:2] < (course_id, level):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _challenge_at(self, position):
+        with self._cache_lock:
+            challenge = self._cache.get(position)
+            if challenge is not None:
+                self._cache.move_to_end(position)
+                return challenge
+
+        course_id, level, challenge_id, offset, length = self._level_entry(position)
+        (title, description, video_url, intro_text, conclusion_text,
+         code_snippets, questions, coding_exercises) = json.loads(self._buffer[offset:offset + length])
+        challenge = Challenge(challenge_id, course_id, level, title, description, video_url, intro_text, conclusion_text)
+        challenge.code_snippets = code_snippets
+        challenge.questions = questions
+        challenge.coding_exercises = coding_exercises
+        challenge.difficulty = next((e["difficulty"] for e in coding_exercises if e.get("difficulty")), None)
+
+        with self._cache_lock:
+            self._cache[position] = challenge
+            if len(self._cache) > CHALLENGE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return challenge
+
+    def get_challenge(self, challenge_id):
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry_id, position = _ID_ENTRY.unpack_from(self._buffer, self._id_index_offset + mid * _ID_ENTRY.size)
+            if entry_id == challenge_id:
+                return self._challenge_at(position)
+            if entry_id < challenge_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get_challenge_by_level(self, course_id, level):
+        position = self._level_lower_bound(course_id, level)
+        if position < self._count and self._level_entry(position)[:2] == (course_id, level):
+            return self._challenge_at(position)
+        return None
+
+    def get_course_challenges(self, course_id):
+        start = self._level_lower_bound(course_id, 0)
+        end = self._level_lower_bound(course_id + 1, 0)
+        return [self._challenge_at(position) for position in range(start, end)]
+
+    def get_level_count(self, course_id):
+        # Counted from the level index without decoding any challenge
+        return self._level_lower_bound(course_id + 1, 0) - self._level_lower_bound(course_id, 0)
+
+
+def open_snapshot(version, generation, path=None):
+    """Map the snapshot read-only if it holds ``version`` of ``generation``, else return None."""
+    path = path or snapshot_path()
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buffer) < _HEADER.size:
+        buffer.close()
+        return None
+    (magic, format_version, snapshot_version, snapshot_generation, courses_offset, courses_length,
+     count, level_index_offset, id_index_offset) = _HEADER.unpack_from(buffer, 0)
+    if (magic != MAGIC or format_version != FORMAT_VERSION
+            or (snapshot_version, snapshot_generation) != (version, generation)):
+        buffer.close()
+        return None
+
+    courses = [Course(*row) for row in json.loads(buffer[courses_offset:courses_offset + courses_length])]
+    return SnapshotCatalog(version, generation, courses, buffer, count, level_index_offset, id_index_offset)
+
+
+def load_snapshot_catalog(cursor, version, generation):
+    """Open the snapshot for ``version`` and ``generation``, building it from the database if needed.
+
+    Falls back to the fully decoded catalog if the snapshot cannot be written.
+    """
+    catalog = open_snapshot(version, generation)
+    if catalog is not None:
+        return catalog
+    catalog = load_catalog(cursor, version, generation)
+    try:
+        write_snapshot(catalog)
+    except OSError:
+        return catalog
+    return open_snapshot(version, generation) or catalog
+
+
+def main():
+    db.ensure_schema()
+    with db.get_db_connection() as conn:
+        cursor = conn.cursor()
+        version, generation = get_catalog_version(cursor)
+        catalog = load_catalog(cursor, version, generation)
+    write_snapshot(catalog)
+    print(f"Wrote catalog version {version} ({len(catalog.challenges_by_id)} challenges, "
+          f"{os.path.getsize(snapshot_path())} bytes) to {snapshot_path()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Run student code submissions against their test cases in isolated processes.
+
+A fixed pool of worker processes is started ahead of time so a submission
+never waits for a process to start. Each worker runs exactly one job: it
+compiles the submission once, executes it once and calls the exercise
+function for every test case in the same pass, then it is discarded and a
+fresh worker takes its place. A submission therefore cannot leave patched
+builtins or modules behind for the next student's code. Workers run with a
+memory cap and a CPU-time budget, and the server waits at most a wall-clock
+timeout before killing the worker.
+
+Jobs and results cross the pipe as JSON bytes, never as pickles. The
+submission runs in the worker and can reach its end of the pipe, so anything
+the server reads back is untrusted: it is size-capped, decoded as plain JSON
+and checked against the test cases before it is returned.
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; limits are skipped there
+    resource = None
+
+POOL_SIZE = max(2, min(8, os.cpu_count() or 2))
+WALL_TIMEOUT_SECONDS = 5
+CPU_SECONDS = 3
+MEMORY_LIMIT_MB = 512
+# How long a submission waits for a free worker before giving up
+QUEUE_TIMEOUT_SECONDS = 30
+# Largest result message the server accepts from a worker
+MAX_RESULT_BYTES = 1 << 20
+
+# Errors reported by the runner rather than raised by the submission
+RUNNER_BUSY_ERROR = "Code runner is busy, please try again"
+TIME_LIMIT_ERROR = "Time limit exceeded"
+RESOURCE_LIMIT_ERROR = "Execution stopped: time or memory limit exceeded"
+MALFORMED_RESULTS_ERROR = "Execution returned malformed results"
+_RUNNER_ERRORS = (RUNNER_BUSY_ERROR, TIME_LIMIT_ERROR, RESOURCE_LIMIT_ERROR, MALFORMED_RESULTS_ERROR)
+
+
+def _json_safe(value):
+    """Keep JSON-serializable results as they are and fall back to repr()."""
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def _run_tests(user_code, func_name, tests):
+    try:
+        code = compile(user_code, "<submission>", "exec")
+        local_scope = {}
+        exec(code, local_scope)
+        func = local_scope[func_name]
+    except BaseException as e:
+        # The submission itself failed, so every test case fails the same way
+        return [{"input": test["input"], "error": str(e) or type(e).__name__} for test in tests]
+
+    test_results = []
+    for test in tests:
+        try:
+            result = func(test["input"])
+            test_results.append({
+                "input": test["input"],
+                "expected": test["expected"],
+                "got": _json_safe(result),
+                "passed": bool(result == test["expected"])
+            })
+        except BaseException as e:
+            test_results.append({
+                "input": test["input"],
+                "error": str(e) or type(e).__name__
+            })
+    return test_results
+
+
+def _worker_main(conn, memory_limit_bytes):
+    # Submissions must not write into the server's output
+    sys.stdout = open(os.devnull, "w")
+    sys.stderr = open(os.devnull, "w")
+    if resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    try:
+        user_code, func_name, tests, cpu_seconds = json.loads(conn.recv_bytes())
+    except EOFError:
+        return
+    if resource is not None:
+        # RLIMIT_CPU counts from process start, so add the budget to what startup used
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime)
+        hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+        soft = used + cpu_seconds
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    # One job per process: nothing the submission changes outlives it
+    conn.send_bytes(json.dumps(_run_tests(user_code, func_name, tests)).encode("utf-8"))
+
+
+def _checked_results(results, tests):
+    """Rebuild a worker's results from the test cases, or return None if they are malformed."""
+    if not isinstance(results, list) or len(results) != len(tests):
+        return None
+    checked = []
+    for result, test in zip(results, tests):
+        if not isinstance(result, dict):
+            return None
+        if "error" in result:
+            if not isinstance(result["error"], str):
+                return None
+            checked.append({"input": test["input"], "error": result["error"]})
+        elif "got" in result and isinstance(result.get("passed"), bool):
+            checked.append({
+                "input": test["input"],
+                "expected": test["expected"],
+                "got": result["got"],
+                "passed": result["passed"]
+            })
+        else:
+            return None
+    return checked
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "closed", "lock")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def kill(self):
+        # Both the replacement thread and shutdown() may get here
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.conn.close()
+        self.process.kill()
+        self.process.join(timeout=1)
+
+
+class RunnerPool:
+    """A fixed set of pre-started worker processes shared by all sessions."""
+
+    def __init__(self, size=POOL_SIZE):
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(method)
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, MEMORY_LIMIT_MB * 1024 * 1024),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._workers.append(worker)
+        if closed:
+            worker.kill()
+            return None
+        return worker
+
+    def _replace(self, worker):
+        with self._lock:
+            if worker not in self._workers:
+                # Taken by shutdown(), which kills it
+                return
+            self._workers.remove(worker)
+        worker.kill()
+        replacement = self._spawn()
+        if replacement is not None:
+            self._idle.put(replacement)
+
+    def run(self, user_code, func_name, tests, timeout=WALL_TIMEOUT_SECONDS):
+        """Run every test case against the submission and return one result per test."""
+        try:
+            worker = self._idle.get(timeout=QUEUE_TIMEOUT_SECONDS)
+        except queue.Empty:
+            return [{"input": test["input"], "error": RUNNER_BUSY_ERROR} for test in tests]
+
+        try:
+            try:
+                worker.conn.send_bytes(json.dumps((user_code, func_name, tests, CPU_SECONDS)).encode("utf-8"))
+                if worker.conn.poll(timeout):
+                    results = _checked_results(
+                        json.loads(worker.conn.recv_bytes(maxlength=MAX_RESULT_BYTES)), tests
+                    )
+                    if results is not None:
+                        return results
+                    error = MALFORMED_RESULTS_ERROR
+                else:
+                    error = f"{TIME_LIMIT_ERROR} ({timeout}s)"
+            except (EOFError, OSError):
+                # The worker died, usually from the CPU or memory limit; an
+                # oversized message also lands here
+                error = RESOURCE_LIMIT_ERROR
+            except ValueError:
+                # Not JSON, e.g. a pickle sent by the submission
+                error = MALFORMED_RESULTS_ERROR
+            return [{"input": test["input"], "error": error} for test in tests]
+        finally:
+            # Workers are never reused; start the replacement off the request path
+            threading.Thread(target=self._replace, args=(worker,), daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.kill()
+
+
+def has_runner_errors(test_results):
+    """Whether any result is a runner failure, such as a busy pool or a timeout under load.
+
+    These depend on the server's state at the time, not on the submission.
+    """
+    return any(
+        isinstance(result.get("error"), str) and result["error"].startswith(_RUNNER_ERRORS)
+        for result in test_results
+    )
+
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def get_runner_pool():
+    """Start the shared worker pool on first use and return it."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RunnerPool()
+                atexit.register(_pool.shutdown)
+    return _pool
+
+
+def run_test_cases(user_code, exercise):
+    """Run the submission against the exercise's test cases in the worker pool."""
+    tests = exercise["test_cases"]
+    try:
+        # Get the function name from the first line of starter code
+        func_name = exercise["starter_code"].split("def ")[1].split("(")[0]
+    except (KeyError, IndexError, AttributeError) as e:
+        return [{"input": test["input"], "error": str(e) or type(e).__name__} for test in tests]
+    return get_runner_pool().run(user_code, func_name, tests)
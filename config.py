@@ -0,0 +1,31 @@
+"""Settings read from environment variables, then Streamlit secrets."""
+import os
+import sys
+
+
+def get_setting(name, default=None):
+    """Return a setting from the environment or st.secrets, or default if unset."""
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+    # Only consult st.secrets when running under Streamlit, so command-line
+    # tools do not pay for importing it
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return default
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        # No secrets file
+        return default
+
+
+# Local reflection classifications below this confidence are sent to Gemini
+REFLECTION_CONFIDENCE_THRESHOLD = float(get_setting("REFLECTION_CONFIDENCE_THRESHOLD", 0.7))
+
+# Gemini client settings
+GEMINI_API_KEY = get_setting("GEMINI_API_KEY")
+GEMINI_MODEL = get_setting("GEMINI_MODEL", "gemini-2.5-flash-preview-04-17")
+GEMINI_TIMEOUT_SECONDS = float(get_setting("GEMINI_TIMEOUT_SECONDS", 60))
+# Gemini calls in flight at once across all sessions of this process
+GEMINI_MAX_CONCURRENCY = int(get_setting("GEMINI_MAX_CONCURRENCY", 8))
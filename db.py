@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from migrations import MIGRATIONS
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "focusmate.db")
+
+# Connection settings applied once when a pooled connection is created
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256
+MAX_IDLE_CONNECTIONS = 8
+
+_pool_lock = threading.Lock()
+_idle_connections = []
+_local = threading.local()
+
+
+def _open_connection():
+    """Open a new SQLite connection configured for concurrent use."""
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _acquire():
+    with _pool_lock:
+        if _idle_connections:
+            return _idle_connections.pop()
+    return _open_connection()
+
+
+def _release(conn):
+    with _pool_lock:
+        if len(_idle_connections) < MAX_IDLE_CONNECTIONS:
+            _idle_connections.append(conn)
+            return
+    conn.close()
+
+
+@contextmanager
+def get_db_connection():
+    """Borrow a pooled connection for the current thread.
+
+    Nested uses on the same thread share one connection. The outermost block
+    commits on success, rolls back on error and returns the connection to the
+    pool instead of closing it.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn = _acquire()
+    _local.conn = conn
+    _local.depth = 1
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        _local.depth = 0
+        _release(conn)
+
+
+def close_all_connections():
+    """Close every idle pooled connection."""
+    with _pool_lock:
+        while _idle_connections:
+            _idle_connections.pop().close()
+
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def migrate(conn):
+    """Apply pending migrations and record each one in PRAGMA user_version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    while version < len(MIGRATIONS):
+        # Take the write lock first so concurrent processes migrate one at a time
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.rollback()
+            break
+        try:
+            MIGRATIONS[version](conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        version += 1
+    return version
+
+
+def ensure_schema():
+    """Bring the schema up to date once per process; later calls return at once."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        with get_db_connection() as conn:
+            migrate(conn)
+        _schema_ready = True
@@ -0,0 +1,197 @@
+"""Background queue for Gemini code evaluations.
+
+Submitting code stores a pending row in code_evaluations and hands the job to
+a small thread pool, so the page returns at once. The row is updated when the
+feedback arrives, which lets a rerun or a reconnected session pick up the
+result instead of submitting the code again. While a job runs, its feedback
+chunks are also kept in memory so the page can stream them as they arrive.
+"""
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from ai import evaluate_code_with_gemini
+from catalog import get_catalog
+from db import get_db_connection
+
+MAX_WORKERS = 4
+
+CodeEvaluation = namedtuple("CodeEvaluation", ["id", "status", "feedback"])
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="code-eval")
+# Guards _buffers and is notified whenever a buffer gets a chunk or finishes
+_feedback_ready = threading.Condition()
+# Feedback buffers of the jobs queued or running in this process
+_buffers = {}
+
+
+class _FeedbackBuffer:
+    __slots__ = ("chunks", "done")
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+
+
+def _find_exercise(challenge_id, exercise_title):
+    challenge = get_catalog().get_challenge(challenge_id)
+    if challenge is None:
+        return None
+    for exercise in challenge.coding_exercises:
+        if exercise["title"] == exercise_title:
+            return exercise
+    return None
+
+
+def _run_job(job_id):
+    buffer = _buffers[job_id]
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT challenge_id, exercise_title, code FROM code_evaluations WHERE id = ?
+            ''', (job_id,))
+            challenge_id, exercise_title, code = cursor.fetchone()
+            cursor.execute("UPDATE code_evaluations SET status = 'running' WHERE id = ?", (job_id,))
+
+        exercise = _find_exercise(challenge_id, exercise_title)
+        if exercise is None:
+            status, feedback = "error", "Error evaluating code: the exercise no longer exists"
+        else:
+            for chunk in evaluate_code_with_gemini(code, exercise, stream=True):
+                with _feedback_ready:
+                    buffer.chunks.append(chunk)
+                    _feedback_ready.notify_all()
+            status, feedback = "done", "".join(buffer.chunks)
+    except Exception as e:
+        status, feedback = "error", f"Error evaluating code: {str(e)}"
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            UPDATE code_evaluations
+            SET status = ?, feedback = ?, completed_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            ''', (status, feedback, job_id))
+            # Reflections saved while the feedback was still streaming get it now
+            fill_reflection_feedback(cursor, job_id)
+    finally:
+        with _feedback_ready:
+            if status == "error":
+                # Readers may already have part of the feedback; end it with the error
+                buffer.chunks.append(f"\n\n{feedback}" if buffer.chunks else feedback)
+            elif not buffer.chunks:
+                buffer.chunks.append(feedback)
+            buffer.done = True
+            del _buffers[job_id]
+            _feedback_ready.notify_all()
+
+
+def fill_reflection_feedback(cursor, job_id):
+    """Copy a finished job's feedback into reflections saved before it finished.
+
+    Both the job and the reflection call this when they are written, so
+    whichever comes last fills the code_feedback of the reflection's ai_feedback.
+    """
+    cursor.execute('''
+    UPDATE reflections
+    SET ai_feedback = json_set(COALESCE(ai_feedback, '{}'), '$.code_feedback',
+                               (SELECT feedback FROM code_evaluations WHERE id = ?))
+    WHERE code_evaluation_id = ?
+    AND json_extract(COALESCE(ai_feedback, '{}'), '$.code_feedback') IS NULL
+    AND EXISTS (SELECT 1 FROM code_evaluations WHERE id = ? AND status IN ('done', 'error'))
+    ''', (job_id, job_id, job_id))
+
+
+def _enqueue(job_id):
+    with _feedback_ready:
+        if job_id in _buffers:
+            return
+        _buffers[job_id] = _FeedbackBuffer()
+    _executor.submit(_run_job, job_id)
+
+
+def submit_code_evaluation(user_id, challenge_id, exercise, user_code):
+    """Queue a submission for evaluation and return its job id without waiting."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # The same code for the same exercise reuses an earlier job unless it failed
+        cursor.execute('''
+        SELECT id FROM code_evaluations
+        WHERE user_id = ? AND challenge_id = ? AND exercise_title = ? AND code = ?
+        AND status IN ('pending', 'running', 'done')
+        ORDER BY id DESC LIMIT 1
+        ''', (user_id, challenge_id, exercise["title"], user_code))
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+
+        cursor.execute('''
+        INSERT INTO code_evaluations (user_id, challenge_id, exercise_title, code)
+        VALUES (?, ?, ?, ?)
+        ''', (user_id, challenge_id, exercise["title"], user_code))
+        job_id = cursor.lastrowid
+
+    _enqueue(job_id)
+    return job_id
+
+
+def get_code_evaluation(job_id):
+    """Current status and feedback of a job, or None if it does not exist."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, status, feedback FROM code_evaluations WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    evaluation = CodeEvaluation(*row)
+    if evaluation.status in ("pending", "running"):
+        # Jobs left unfinished by a previous server process are queued again
+        _enqueue(job_id)
+    return evaluation
+
+
+def get_open_code_evaluation(user_id, challenge_id):
+    """Latest job for the challenge that the user has not reflected on yet."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT e.id FROM code_evaluations e
+        WHERE e.user_id = ? AND e.challenge_id = ?
+        AND NOT EXISTS (
+            SELECT 1 FROM reflections r
+            WHERE r.user_id = e.user_id AND r.challenge_id = e.challenge_id AND r.created_at >= e.created_at
+        )
+        ORDER BY e.id DESC LIMIT 1
+        ''', (user_id, challenge_id))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def stream_code_evaluation(job_id):
+    """Yield a job's feedback as it arrives and stop once the job has finished."""
+    evaluation = get_code_evaluation(job_id)
+    if evaluation is None:
+        return
+    with _feedback_ready:
+        buffer = _buffers.get(job_id)
+    if buffer is None:
+        # Finished already, possibly between the two lookups
+        evaluation = get_code_evaluation(job_id)
+        if evaluation.feedback:
+            yield evaluation.feedback
+        return
+
+    sent = 0
+    while True:
+        with _feedback_ready:
+            while len(buffer.chunks) == sent and not buffer.done:
+                _feedback_ready.wait()
+            new_chunks = buffer.chunks[sent:]
+            done = buffer.done
+        sent += len(new_chunks)
+        yield from new_chunks
+        if done:
+            return
@@ -0,0 +1,145 @@
+"""Persistent cache of Gemini code feedback.
+
+Entries are keyed by the exercise, a hash of the submission's normalized
+syntax tree and the local test results. The normalized tree ignores
+whitespace, comments, docstrings and the names chosen for variables,
+arguments and functions, so trivially different submissions share one entry.
+Entries expire after FEEDBACK_CACHE_TTL_DAYS and the least recently used
+ones are evicted beyond FEEDBACK_CACHE_MAX_ENTRIES.
+"""
+import ast
+import builtins
+import hashlib
+import json
+
+from db import get_db_connection
+
+FEEDBACK_CACHE_TTL_DAYS = 30
+FEEDBACK_CACHE_MAX_ENTRIES = 5000
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+
+class _Normalizer(ast.NodeTransformer):
+    """Rename identifiers in order of first appearance and drop docstrings."""
+
+    def __init__(self):
+        self.names = {}
+
+    def _rename(self, name):
+        if name in _BUILTIN_NAMES:
+            return name
+        return self.names.setdefault(name, f"v{len(self.names)}")
+
+    def visit_Name(self, node):
+        node.id = self._rename(node.id)
+        return node
+
+    def visit_arg(self, node):
+        node.arg = self._rename(node.arg)
+        self.generic_visit(node)
+        return node
+
+    def _visit_definition(self, node):
+        node.name = self._rename(node.name)
+        node.body = _strip_docstring(node.body)
+        self.generic_visit(node)
+        return node
+
+    visit_FunctionDef = _visit_definition
+    visit_AsyncFunctionDef = _visit_definition
+    visit_ClassDef = _visit_definition
+
+
+def _strip_docstring(body):
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        return body[1:] or [ast.Pass()]
+    return body
+
+
+def normalize_code(user_code):
+    """A canonical text form of the submission used for hashing."""
+    try:
+        tree = ast.parse(user_code)
+    except SyntaxError:
+        # Code that does not parse is only normalized for whitespace
+        return "\n".join(line.strip() for line in user_code.splitlines() if line.strip())
+    tree.body = _strip_docstring(tree.body)
+    return ast.dump(_Normalizer().visit(tree), annotate_fields=False)
+
+
+def feedback_cache_key(exercise, user_code, test_results):
+    """Content hash identifying the feedback for this submission."""
+    payload = json.dumps([
+        exercise["title"],
+        exercise.get("description"),
+        exercise.get("starter_code"),
+        normalize_code(user_code),
+        test_results
+    ], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_feedback(key):
+    """Return cached feedback for key, or None, and count the hit or miss."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT feedback FROM feedback_cache
+        WHERE key = ? AND created_at >= datetime('now', ?)
+        ''', (key, f"-{FEEDBACK_CACHE_TTL_DAYS} days"))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute('''
+            UPDATE feedback_cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP WHERE key = ?
+            ''', (key,))
+        counter = "feedback_cache_hits" if row else "feedback_cache_misses"
+        cursor.execute("UPDATE app_meta SET value = value + 1 WHERE key = ?", (counter,))
+    return row[0] if row else None
+
+
+def store_feedback(key, feedback):
+    """Cache feedback under key and evict expired and least recently used entries."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT OR REPLACE INTO feedback_cache (key, feedback) VALUES (?, ?)
+        ''', (key, feedback))
+        cursor.execute('''
+        DELETE FROM feedback_cache WHERE created_at < datetime('now', ?)
+        ''', (f"-{FEEDBACK_CACHE_TTL_DAYS} days",))
+        cursor.execute('''
+        DELETE FROM feedback_cache WHERE key IN (
+            SELECT key FROM feedback_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+        )
+        ''', (FEEDBACK_CACHE_MAX_ENTRIES,))
+
+
+def get_feedback_cache_stats():
+    """Hit and miss counters and the current number of entries."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT key, value FROM app_meta WHERE key IN ('feedback_cache_hits', 'feedback_cache_misses')
+        ''')
+        counters = dict(cursor.fetchall())
+        cursor.execute("SELECT COUNT(*) FROM feedback_cache")
+        entries = cursor.fetchone()[0]
+    hits = counters.get("feedback_cache_hits", 0)
+    misses = counters.get("feedback_cache_misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0,
+        "entries": entries,
+        "max_entries": FEEDBACK_CACHE_MAX_ENTRIES
+    }
+
+
+if __name__ == "__main__":
+    from db import ensure_schema
+
+    ensure_schema()
+    for name, value in get_feedback_cache_stats().items():
+        print(f"{name}: {value}")
@@ -0,0 +1,68 @@
+"""Process-wide cache of serialized Plotly figures.
+
+Each user's figures are stored as JSON together with the user's data
+version. Triggers bump that version whenever a quiz attempt, study session,
+progress row or reflection of the user is written, so a cached figure is
+only served while the data behind it is unchanged. The cache is a
+least-recently-used map bounded by the total size of the stored JSON.
+
+Callers read the version before the data the figures are built from. A write
+landing in between then leaves figures cached under the older version, which
+the next read rebuilds, instead of stale figures under the newer one. Cached
+figures are returned as plain dicts decoded from the JSON, which
+st.plotly_chart takes as they are, so a cache hit never builds Figure objects.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from db import get_db_connection
+
+FIGURE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_lock = threading.Lock()
+# user_id -> (data version, {figure name: figure JSON}, size in bytes)
+_entries = OrderedDict()
+_size = 0
+
+
+def get_user_data_version(user_id):
+    """The user's current data version, 0 if nothing has been written yet."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM user_data_versions WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def get_cached_figures(user_id, version, build):
+    """The user's figures, rebuilt with build() only if their data has changed.
+
+    ``version`` is the user's data version, read before the data build() uses.
+    ``build`` returns a dict of figure name to Plotly figure. The result maps
+    the same names to figure dicts decoded from the cached JSON.
+    """
+    global _size
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] == version:
+            _entries.move_to_end(user_id)
+            figures = entry[1]
+        else:
+            figures = None
+
+    if figures is None:
+        figures = {name: figure.to_json() for name, figure in build().items()}
+        size = sum(len(figure_json) for figure_json in figures.values())
+        with _lock:
+            previous = _entries.pop(user_id, None)
+            if previous is not None:
+                _size -= previous[2]
+            _entries[user_id] = (version, figures, size)
+            _size += size
+            # Evict least recently used users, always keeping the newest entry
+            while _size > FIGURE_CACHE_MAX_BYTES and len(_entries) > 1:
+                _, (_, _, evicted_size) = _entries.popitem(last=False)
+                _size -= evicted_size
+
+    return {name: json.loads(figure_json) for name, figure_json in figures.items()}
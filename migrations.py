@@ -0,0 +1,502 @@
+"""Ordered schema migrations.
+
+Each migration receives an open cursor inside a transaction. The position of a
+migration in MIGRATIONS is its schema version, recorded in PRAGMA user_version
+once it has been applied. Only ever append to the list.
+
+Migrations never import application modules. Their code has to stay exactly
+as it was when they first ran, so helpers they need are frozen copies here.
+"""
+import json
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def create_base_tables(cursor):
+    # Users table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE,
+        password TEXT,
+        experience_level TEXT,
+        learning_goals TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Courses table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS courses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        category TEXT,
+        total_chapters INTEGER,
+        total_lectures INTEGER,
+        difficulty_level TEXT,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # User progress table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        course_id INTEGER,
+        progress_percentage REAL,
+        overall_score REAL,
+        status TEXT,
+        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (course_id) REFERENCES courses (id)
+    )
+    ''')
+
+    # Challenges table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS challenges (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        course_id INTEGER,
+        level INTEGER,
+        title TEXT NOT NULL,
+        description TEXT,
+        video_url TEXT,
+        quiz_data TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (course_id) REFERENCES courses (id)
+    )
+    ''')
+
+    # User reflections table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS reflections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        challenge_id INTEGER,
+        reflection_text TEXT,
+        ai_feedback TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+
+    # Quiz attempts table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quiz_attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        challenge_id INTEGER,
+        answers TEXT,
+        score REAL,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+
+    # Study sessions table (for Pomodoro tracking)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS study_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER,
+        session_type TEXT,
+        duration_minutes INTEGER,
+        completed BOOLEAN,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+
+
+def add_last_challenge_id(cursor):
+    # Databases created before versioning may already have the column
+    if not _column_exists(cursor, "user_progress", "last_challenge_id"):
+        cursor.execute("ALTER TABLE user_progress ADD COLUMN last_challenge_id INTEGER")
+
+
+def add_hot_path_indexes(cursor):
+    # Progress lookups per user, per course and by most recently accessed
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_progress_user_course ON user_progress (user_id, course_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_progress_user_accessed ON user_progress (user_id, last_accessed)")
+    # Level lookups within a course
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_challenges_course_level ON challenges (course_id, level)")
+    # Reflection counts per course and activity dates per user
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reflections_user_challenge ON reflections (user_id, challenge_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reflections_user_created ON reflections (user_id, created_at)")
+    # Covering indexes for the analytics aggregates
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_completed ON quiz_attempts (user_id, completed_at, challenge_id, score)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_study_sessions_user_created ON study_sessions (user_id, created_at, session_type, duration_minutes, completed)")
+
+
+def _write_split_content(cursor, challenge_id, content):
+    # Frozen copy of the content writer as it was when split_challenge_content was added
+    cursor.execute('''
+    UPDATE challenges SET intro_text = ?, conclusion_text = ? WHERE id = ?
+    ''', (content.get("intro_text", ""), content.get("conclusion_text", ""), challenge_id))
+
+    for position, snippet in enumerate(content.get("code_snippets", [])):
+        cursor.execute('''
+        INSERT INTO code_snippets (challenge_id, position, title, code)
+        VALUES (?, ?, ?, ?)
+        ''', (challenge_id, position, snippet.get("title"), snippet.get("code")))
+
+    for position, question in enumerate(content.get("questions", [])):
+        cursor.execute('''
+        INSERT INTO questions (challenge_id, position, question, options, correct, difficulty)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            challenge_id,
+            position,
+            question["question"],
+            json.dumps(question.get("options", [])),
+            question.get("correct"),
+            question.get("difficulty")
+        ))
+
+    for position, exercise in enumerate(content.get("coding_exercises", [])):
+        cursor.execute('''
+        INSERT INTO coding_exercises (challenge_id, position, title, description, difficulty, starter_code, hints)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            challenge_id,
+            position,
+            exercise["title"],
+            exercise.get("description"),
+            exercise.get("difficulty"),
+            exercise.get("starter_code"),
+            json.dumps(exercise.get("hints", []))
+        ))
+        exercise_id = cursor.lastrowid
+        for test_position, test in enumerate(exercise.get("test_cases", [])):
+            cursor.execute('''
+            INSERT INTO test_cases (exercise_id, challenge_id, position, input, expected)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (exercise_id, challenge_id, test_position, json.dumps(test.get("input")), json.dumps(test.get("expected"))))
+
+
+def split_challenge_content(cursor):
+    cursor.execute("ALTER TABLE challenges ADD COLUMN intro_text TEXT")
+    cursor.execute("ALTER TABLE challenges ADD COLUMN conclusion_text TEXT")
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS code_snippets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        challenge_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        title TEXT,
+        code TEXT,
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        challenge_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        question TEXT NOT NULL,
+        options TEXT,
+        correct TEXT,
+        difficulty TEXT,
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS coding_exercises (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        challenge_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        difficulty TEXT,
+        starter_code TEXT,
+        hints TEXT,
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+
+    # input and expected hold JSON values since test arguments can be any type
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS test_cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        exercise_id INTEGER NOT NULL,
+        challenge_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        input TEXT,
+        expected TEXT,
+        FOREIGN KEY (exercise_id) REFERENCES coding_exercises (id),
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_code_snippets_challenge ON code_snippets (challenge_id, position)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questions_challenge ON questions (challenge_id, position)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_coding_exercises_challenge ON coding_exercises (challenge_id, position, difficulty)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_test_cases_challenge ON test_cases (challenge_id, exercise_id, position)")
+
+    # Move existing quiz_data blobs into the new tables
+    cursor.execute("SELECT id, quiz_data FROM challenges WHERE quiz_data IS NOT NULL")
+    for challenge_id, quiz_data in cursor.fetchall():
+        _write_split_content(cursor, challenge_id, json.loads(quiz_data))
+    cursor.execute("UPDATE challenges SET quiz_data = NULL")
+
+
+def add_app_meta(cursor):
+    # Small key/value table for process-wide counters such as the catalog version
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS app_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('catalog_version', 1)")
+
+
+def add_code_evaluations(cursor):
+    # Background code evaluation jobs, kept so a rerun or reconnect can pick up the result
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS code_evaluations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        challenge_id INTEGER NOT NULL,
+        exercise_title TEXT NOT NULL,
+        code TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        feedback TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (challenge_id) REFERENCES challenges (id)
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_code_evaluations_user_challenge ON code_evaluations (user_id, challenge_id, exercise_title)")
+
+
+def add_feedback_cache(cursor):
+    # Gemini code feedback keyed by exercise, normalized submission and test results
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS feedback_cache (
+        key TEXT PRIMARY KEY,
+        feedback TEXT NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_feedback_cache_last_used ON feedback_cache (last_used_at)")
+    cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('feedback_cache_hits', 0)")
+    cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('feedback_cache_misses', 0)")
+
+
+def add_reflection_counters(cursor):
+    # Reflections classified locally versus escalated to Gemini
+    cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('reflections_local', 0)")
+    cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('reflections_escalated', 0)")
+
+
+def add_timer_events(cursor):
+    # Append-only Pomodoro timer log; study session durations are derived from it
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS timer_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        session_id INTEGER NOT NULL,
+        event TEXT NOT NULL,
+        mode TEXT NOT NULL,
+        elapsed_seconds REAL NOT NULL DEFAULT 0,
+        occurred_at REAL NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (session_id) REFERENCES study_sessions (id)
+    )
+    ''')
+    # Latest event per user to rebuild the timer, latest event per session to close intervals
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timer_events_user ON timer_events (user_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_timer_events_session ON timer_events (session_id, id)")
+
+    cursor.execute("ALTER TABLE study_sessions ADD COLUMN duration_seconds REAL NOT NULL DEFAULT 0")
+    cursor.execute("UPDATE study_sessions SET duration_seconds = COALESCE(duration_minutes, 0) * 60")
+
+
+def add_daily_activity(cursor):
+    # One row per user and active day, and each user's cached streaks
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_activity (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_streaks (
+        user_id INTEGER PRIMARY KEY,
+        current_streak INTEGER NOT NULL,
+        longest_streak INTEGER NOT NULL,
+        last_day TEXT NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+
+    # Backfill from completed study sessions and reflections
+    cursor.execute('''
+    INSERT OR IGNORE INTO daily_activity (user_id, day)
+    SELECT user_id, DATE(created_at) FROM study_sessions WHERE completed = 1 AND user_id IS NOT NULL
+    UNION
+    SELECT user_id, DATE(created_at) FROM reflections WHERE user_id IS NOT NULL
+    ''')
+    # Each run of consecutive days shares day - row_number; the current streak
+    # is the run ending on the user's last active day
+    cursor.execute('''
+    WITH numbered AS (
+        SELECT user_id, day, julianday(day) - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS run
+        FROM daily_activity
+    ), runs AS (
+        SELECT user_id, COUNT(*) AS length, MAX(day) AS last_day
+        FROM numbered
+        GROUP BY user_id, run
+    )
+    INSERT OR REPLACE INTO user_streaks (user_id, current_streak, longest_streak, last_day)
+    SELECT user_id,
+           (SELECT latest.length FROM runs latest WHERE latest.user_id = runs.user_id ORDER BY latest.last_day DESC LIMIT 1),
+           MAX(length),
+           MAX(last_day)
+    FROM runs
+    GROUP BY user_id
+    ''')
+
+
+def add_daily_rollups(cursor):
+    # Daily quiz and study aggregates per user, kept current at write time
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_quiz_rollups (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        course_id INTEGER NOT NULL,
+        attempts INTEGER NOT NULL,
+        score_sum REAL NOT NULL,
+        PRIMARY KEY (user_id, day, course_id)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_study_rollups (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        session_type TEXT NOT NULL,
+        sessions INTEGER NOT NULL,
+        duration_seconds REAL NOT NULL,
+        PRIMARY KEY (user_id, day, session_type)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    INSERT INTO daily_quiz_rollups (user_id, day, course_id, attempts, score_sum)
+    SELECT qa.user_id, DATE(qa.completed_at), ch.course_id, COUNT(*), SUM(qa.score)
+    FROM quiz_attempts qa
+    JOIN challenges ch ON qa.challenge_id = ch.id
+    WHERE qa.user_id IS NOT NULL
+    GROUP BY qa.user_id, DATE(qa.completed_at), ch.course_id
+    ''')
+    cursor.execute('''
+    INSERT INTO daily_study_rollups (user_id, day, session_type, sessions, duration_seconds)
+    SELECT user_id, DATE(created_at), COALESCE(session_type, 'Work'), COUNT(*), SUM(duration_seconds)
+    FROM study_sessions
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, DATE(created_at), COALESCE(session_type, 'Work')
+    ''')
+
+
+def add_user_data_versions(cursor):
+    # Bumped by triggers whenever a row shown on the analytics page changes
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_data_versions (
+        user_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    for table, operation in (
+        ("quiz_attempts", "INSERT"),
+        ("study_sessions", "INSERT"),
+        ("study_sessions", "UPDATE"),
+        ("user_progress", "INSERT"),
+        ("user_progress", "UPDATE"),
+        ("reflections", "INSERT"),
+    ):
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS bump_user_data_version_{table}_{operation.lower()}
+        AFTER {operation} ON {table}
+        WHEN NEW.user_id IS NOT NULL
+        BEGIN
+            INSERT INTO user_data_versions (user_id, version) VALUES (NEW.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        ''')
+
+
+def add_catalog_import_keys(cursor):
+    # Natural keys and content hashes so catalog imports can upsert and skip unchanged records
+    cursor.execute("ALTER TABLE courses ADD COLUMN content_hash TEXT")
+    cursor.execute("ALTER TABLE challenges ADD COLUMN content_hash TEXT")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_courses_name ON courses (name)")
+    cursor.execute("DROP INDEX IF EXISTS idx_challenges_course_level")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_challenges_course_level ON challenges (course_id, level)")
+    # Hash of the last catalog file imported from each path
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS catalog_imports (
+        source TEXT PRIMARY KEY,
+        file_hash TEXT NOT NULL,
+        imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def mark_failed_code_evaluations(cursor):
+    # Failed evaluations used to be stored as finished feedback; mark them as errors
+    cursor.execute('''
+    UPDATE code_evaluations SET status = 'error'
+    WHERE status = 'done' AND feedback LIKE 'Error evaluating code:%'
+    ''')
+
+
+def add_reflection_code_evaluation(cursor):
+    # The code evaluation a reflection was written against, so late feedback can be filled in
+    cursor.execute("ALTER TABLE reflections ADD COLUMN code_evaluation_id INTEGER REFERENCES code_evaluations (id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reflections_code_evaluation ON reflections (code_evaluation_id)")
+
+
+def add_catalog_generation(cursor):
+    # Random id of the catalog's contents, replaced on every catalog version bump;
+    # a fresh or restored database can repeat a version but not a generation
+    cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('catalog_generation', random())")
+
+
+def add_feedback_cache_created_index(cursor):
+    # store_feedback expires entries by created_at
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_feedback_cache_created ON feedback_cache (created_at)")
+
+
+MIGRATIONS = [
+    create_base_tables,
+    add_last_challenge_id,
+    add_hot_path_indexes,
+    split_challenge_content,
+    add_app_meta,
+    add_code_evaluations,
+    add_feedback_cache,
+    add_reflection_counters,
+    add_timer_events,
+    add_daily_activity,
+    add_daily_rollups,
+    add_user_data_versions,
+    add_catalog_import_keys,
+    mark_failed_code_evaluations,
+    add_reflection_code_evaluation,
+    add_catalog_generation,
+    add_feedback_cache_created_index,
+]
@@ -0,0 +1,62 @@
+"""Per-user progress queries shared by the pages."""
+from collections import namedtuple
+
+from db import get_db_connection
+
+CourseSummary = namedtuple("CourseSummary", [
+    "course_id", "name", "difficulty_level", "description",
+    "progress", "score", "status", "last_accessed", "reflections"
+])
+
+AchievementStats = namedtuple("AchievementStats", ["reflections", "half_way", "completed_course"])
+
+
+def get_user_course_summaries(user_id):
+    """Progress, score, status and reflection count for every enrolled course.
+
+    One grouped query regardless of how many courses the user is enrolled in.
+    Rows are ordered by most recently accessed first.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT c.id, c.name, c.difficulty_level, c.description,
+               COALESCE(up.progress_percentage, 0), COALESCE(up.overall_score, 0), up.status, up.last_accessed,
+               COALESCE(rc.reflections, 0)
+        FROM user_progress up
+        JOIN courses c ON c.id = up.course_id
+        LEFT JOIN (
+            SELECT ch.course_id, COUNT(*) AS reflections
+            FROM reflections r
+            JOIN challenges ch ON r.challenge_id = ch.id
+            WHERE r.user_id = ?
+            GROUP BY ch.course_id
+        ) rc ON rc.course_id = up.course_id
+        WHERE up.user_id = ?
+        ORDER BY up.last_accessed DESC
+        ''', (user_id, user_id))
+        return [CourseSummary(*row) for row in cursor.fetchall()]
+
+
+def summarize_courses(summaries):
+    """Enrolled, completed and average progress totals for the stats cards."""
+    total = len(summaries)
+    completed = sum(1 for s in summaries if s.status == "Completed")
+    avg_progress = sum(s.progress for s in summaries) / total if total else 0
+    return total, completed, avg_progress
+
+
+def get_achievement_stats(user_id):
+    """Reflection count and whether any course is half done or completed."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT
+            (SELECT COUNT(*) FROM reflections WHERE user_id = ?),
+            COALESCE(MAX(progress_percentage) >= 50, 0),
+            COALESCE(MAX(status = 'Completed'), 0)
+        FROM user_progress
+        WHERE user_id = ?
+        ''', (user_id, user_id))
+        reflections, half_way, completed_course = cursor.fetchone()
+    return AchievementStats(reflections, bool(half_way), bool(completed_course))
@@ -0,0 +1,119 @@
+"""Local easy/hard classification of reflections.
+
+A keyword scorer with negation handling classifies most reflections without a
+network call. Only reflections it is unsure about are escalated to Gemini, and
+the share of escalations is counted in app_meta.
+"""
+import re
+
+from db import get_db_connection
+
+EASY_CUES = {
+    "easy": 1.0, "simple": 1.0, "clear": 0.8, "understood": 1.0, "understand": 0.8,
+    "confident": 1.0, "straightforward": 1.0, "intuitive": 0.8, "comfortable": 0.8,
+    "sure": 0.6, "obvious": 0.8, "quick": 0.5, "fun": 0.4, "enjoyed": 0.4,
+}
+HARD_CUES = {
+    "hard": 1.0, "difficult": 1.0, "confused": 1.0, "confusing": 1.0, "challenging": 0.8,
+    "stuck": 1.0, "struggled": 1.0, "struggle": 1.0, "struggling": 1.0, "lost": 0.8,
+    "unclear": 0.8, "tricky": 0.8, "frustrating": 0.8, "complicated": 0.8, "unsure": 0.8,
+    "overwhelming": 1.0, "overwhelmed": 1.0,
+}
+# Phrases matched before single words, scored as one cue
+EASY_PHRASES = {"makes sense": 1.0, "made sense": 1.0, "got it": 0.8, "no problem": 0.8}
+HARD_PHRASES = {"no idea": 1.0, "took me a while": 0.8, "took a while": 0.6}
+
+NEGATIONS = {"not", "no", "never", "hardly", "barely", "without", "nor", "cannot"}
+# How many words before a cue a negation still applies to
+NEGATION_WINDOW = 3
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+def _is_negation(token):
+    return token in NEGATIONS or token.endswith("n't")
+
+
+def classify_reflection_locally(reflection_text):
+    """Classify a reflection as easy or hard with a confidence between 0.5 and 1."""
+    # Padded with spaces so phrases only match whole words
+    text = f" {' '.join(_TOKEN_RE.findall(reflection_text.lower()))} "
+    easy = hard = 0.0
+    found = []
+
+    for phrases, polarity in ((EASY_PHRASES, 1), (HARD_PHRASES, -1)):
+        for phrase, weight in phrases.items():
+            count = text.count(f" {phrase} ")
+            if count:
+                text = text.replace(f" {phrase} ", "  ")
+                found.append(phrase)
+                if polarity > 0:
+                    easy += weight * count
+                else:
+                    hard += weight * count
+
+    tokens = text.split()
+    for i, token in enumerate(tokens):
+        if token in EASY_CUES:
+            weight, polarity = EASY_CUES[token], 1
+        elif token in HARD_CUES:
+            weight, polarity = HARD_CUES[token], -1
+        else:
+            continue
+        # "not easy" counts as hard and "wasn't hard" as easy
+        if any(_is_negation(t) for t in tokens[max(0, i - NEGATION_WINDOW):i]):
+            polarity = -polarity
+            found.append(f"not {token}")
+        else:
+            found.append(token)
+        if polarity > 0:
+            easy += weight
+        else:
+            hard += weight
+
+    total = easy + hard
+    if total == 0:
+        return {"classification": "medium", "confidence": 0.5, "reasoning": "No clear signs of difficulty or ease"}
+
+    # Confidence grows with agreement between the cues and with how many there are
+    agreement = abs(easy - hard) / total
+    support = min(1.0, total / 2)
+    confidence = round(0.5 + 0.5 * agreement * (0.5 + 0.5 * support), 2)
+    classification = "easy" if easy > hard else "hard"
+    return {
+        "classification": classification,
+        "confidence": confidence,
+        "reasoning": f"Local analysis of the wording: {', '.join(found)}"
+    }
+
+
+def record_reflection_route(escalated):
+    """Count a reflection as classified locally or escalated to Gemini."""
+    counter = "reflections_escalated" if escalated else "reflections_local"
+    with get_db_connection() as conn:
+        conn.execute("UPDATE app_meta SET value = value + 1 WHERE key = ?", (counter,))
+
+
+def get_reflection_classifier_stats():
+    """Local and escalated counts and the escalation rate."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT key, value FROM app_meta WHERE key IN ('reflections_local', 'reflections_escalated')
+        ''')
+        counters = dict(cursor.fetchall())
+    local = counters.get("reflections_local", 0)
+    escalated = counters.get("reflections_escalated", 0)
+    return {
+        "local": local,
+        "escalated": escalated,
+        "escalation_rate": escalated / (local + escalated) if local + escalated else 0
+    }
+
+
+if __name__ == "__main__":
+    from db import ensure_schema
+
+    ensure_schema()
+    for name, value in get_reflection_classifier_stats().items():
+        print(f"{name}: {value}")
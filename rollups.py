@@ -0,0 +1,123 @@
+"""Per-user daily rollups behind the Progress Analytics page.
+
+daily_quiz_rollups holds quiz attempt counts and score sums per user, day and
+course. daily_study_rollups holds session counts and study seconds per user,
+day and session type. Both are updated in the same transaction as the rows
+they summarize, so the page reads a few rows per day no matter how large
+quiz_attempts and study_sessions grow. Run this module to rebuild them after
+a backfill:
+
+    python rollups.py             # every user
+    python rollups.py --user 42   # one user
+"""
+import argparse
+
+from db import ensure_schema, get_db_connection
+
+
+def add_quiz_attempt(cursor, user_id, challenge_id, score):
+    """Count a quiz attempt made today in its course's rollup."""
+    cursor.execute('''
+    INSERT INTO daily_quiz_rollups (user_id, day, course_id, attempts, score_sum)
+    SELECT ?, DATE('now'), course_id, 1, ? FROM challenges WHERE id = ?
+    ON CONFLICT (user_id, day, course_id) DO UPDATE SET
+        attempts = attempts + 1,
+        score_sum = score_sum + excluded.score_sum
+    ''', (user_id, score, challenge_id))
+
+
+def add_study_session(cursor, session_id):
+    """Count a new study session on the day it was created."""
+    cursor.execute('''
+    INSERT INTO daily_study_rollups (user_id, day, session_type, sessions, duration_seconds)
+    SELECT user_id, DATE(created_at), COALESCE(session_type, 'Work'), 1, 0 FROM study_sessions WHERE id = ?
+    ON CONFLICT (user_id, day, session_type) DO UPDATE SET sessions = sessions + 1
+    ''', (session_id,))
+
+
+def add_study_seconds(cursor, session_id, seconds):
+    """Add study time to the rollup of the day the session was created."""
+    cursor.execute('''
+    INSERT INTO daily_study_rollups (user_id, day, session_type, sessions, duration_seconds)
+    SELECT user_id, DATE(created_at), COALESCE(session_type, 'Work'), 0, ? FROM study_sessions WHERE id = ?
+    ON CONFLICT (user_id, day, session_type) DO UPDATE SET
+        duration_seconds = duration_seconds + excluded.duration_seconds
+    ''', (seconds, session_id))
+
+
+def rebuild_rollups(cursor, user_id=None):
+    """Recompute the rollups from quiz_attempts and study_sessions."""
+    user_filter = "" if user_id is None else " WHERE user_id = ?"
+    user_params = () if user_id is None else (user_id,)
+
+    cursor.execute(f"DELETE FROM daily_quiz_rollups{user_filter}", user_params)
+    cursor.execute(f'''
+    INSERT INTO daily_quiz_rollups (user_id, day, course_id, attempts, score_sum)
+    SELECT qa.user_id, DATE(qa.completed_at), ch.course_id, COUNT(*), SUM(qa.score)
+    FROM quiz_attempts qa
+    JOIN challenges ch ON qa.challenge_id = ch.id
+    WHERE qa.user_id IS NOT NULL{'' if user_id is None else ' AND qa.user_id = ?'}
+    GROUP BY qa.user_id, DATE(qa.completed_at), ch.course_id
+    ''', user_params)
+
+    cursor.execute(f"DELETE FROM daily_study_rollups{user_filter}", user_params)
+    cursor.execute(f'''
+    INSERT INTO daily_study_rollups (user_id, day, session_type, sessions, duration_seconds)
+    SELECT user_id, DATE(created_at), COALESCE(session_type, 'Work'), COUNT(*), SUM(duration_seconds)
+    FROM study_sessions
+    WHERE user_id IS NOT NULL{'' if user_id is None else ' AND user_id = ?'}
+    GROUP BY user_id, DATE(created_at), COALESCE(session_type, 'Work')
+    ''', user_params)
+
+
+def get_quiz_rollups(user_id):
+    """(day, course_id, average score, attempts) per day and course, oldest first."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT day, course_id, ROUND(score_sum / attempts, 2), attempts
+        FROM daily_quiz_rollups
+        WHERE user_id = ?
+        ORDER BY day
+        ''', (user_id,))
+        return cursor.fetchall()
+
+
+def get_study_rollups(user_id):
+    """(day, session type, sessions, minutes) per day and type, oldest first."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT day, session_type, sessions, ROUND(duration_seconds / 60.0, 1)
+        FROM daily_study_rollups
+        WHERE user_id = ?
+        ORDER BY day
+        ''', (user_id,))
+        return cursor.fetchall()
+
+
+def get_study_summary(user_id, start_day, end_day):
+    """Total sessions and study minutes between two dates, both inclusive."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT COALESCE(SUM(sessions), 0), COALESCE(SUM(duration_seconds), 0) / 60.0
+        FROM daily_study_rollups
+        WHERE user_id = ? AND day BETWEEN ? AND ?
+        ''', (user_id, start_day.isoformat(), end_day.isoformat()))
+        return cursor.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily analytics rollups.")
+    parser.add_argument("--user", type=int, help="Only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    ensure_schema()
+    with get_db_connection() as conn:
+        rebuild_rollups(conn.cursor(), args.user)
+    print("Rollups rebuilt")
+
+
+if __name__ == "__main__":
+    main()
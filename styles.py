@@ -0,0 +1,52 @@
+"""The app's stylesheet, served as a static file and linked once per session.
+
+The CSS used to be sent through st.markdown on every rerun, and some of it once
+per card. It now lives in static/focusmate.css, which Streamlit serves from
+app/static/ (server.enableStaticServing in .streamlit/config.toml). The link
+carries a hash of the file's contents so browsers cache it until it changes.
+"""
+import hashlib
+import json
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+STYLESHEET = "focusmate.css"
+_STYLESHEET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", STYLESHEET)
+
+
+def _content_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+# Hashed once per process; the file only changes with a deploy
+STYLESHEET_URL = f"app/static/{STYLESHEET}?v={_content_hash(_STYLESHEET_PATH)}"
+
+# Runs in a same-origin component iframe and adds the link to the app's own
+# <head>, where it stays for the rest of the page's life
+_INJECT_SCRIPT = """
+<script>
+const doc = window.parent.document;
+let link = doc.getElementById("focusmate-css");
+if (!link) {
+    link = doc.createElement("link");
+    link.id = "focusmate-css";
+    link.rel = "stylesheet";
+    doc.head.appendChild(link);
+}
+if (link.getAttribute("href") !== %s) {
+    link.setAttribute("href", %s);
+}
+</script>
+"""
+
+
+def inject_stylesheet():
+    """Link the stylesheet into the page on the session's first run only."""
+    if st.session_state.get("stylesheet_url") == STYLESHEET_URL:
+        return
+    href = json.dumps(STYLESHEET_URL)
+    components.html(_INJECT_SCRIPT % (href, href), height=0)
+    st.session_state.stylesheet_url = STYLESHEET_URL
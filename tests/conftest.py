@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import catalog  # noqa: E402
+import db  # noqa: E402
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the connection pool at a fresh, fully migrated database."""
+    db.close_all_connections()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "focusmate.db"))
+    monkeypatch.setattr(db, "_schema_ready", False)
+    # The process-wide catalog belongs to whichever database loaded it
+    monkeypatch.setattr(catalog, "_catalog", None)
+    db.ensure_schema()
+    yield db.DB_PATH
+    db.close_all_connections()
@@ -0,0 +1,85 @@
+"""The reflection backfill never stores a fallback for a failed Gemini call."""
+import argparse
+import json
+
+import pytest
+
+import backfill_reflections
+from db import get_db_connection
+
+ORIGINAL = {"code_feedback": "Looks good", "reflection_analysis": {"classification": "medium"}}
+
+
+@pytest.fixture
+def reflections(temp_db, monkeypatch):
+    monkeypatch.setattr(backfill_reflections, "RETRY_DELAY_SECONDS", 0)
+    with get_db_connection() as conn:
+        conn.executemany("INSERT INTO reflections (user_id, reflection_text, ai_feedback) VALUES (1, ?, ?)",
+                         [(text, json.dumps(ORIGINAL)) for text in ("first", "fails", "third", "fourth")])
+        return [row[0] for row in conn.execute("SELECT id FROM reflections ORDER BY id")]
+
+
+def _args(tmp_path, **overrides):
+    values = dict(since=None, until=None, classification=None, force_gemini=True, batch_size=2,
+                  concurrency=2, rate=1000.0, retries=1, checkpoint=str(tmp_path / "checkpoint.json"),
+                  restart=False, dry_run=False, failed_file=str(tmp_path / "failed.json"), retry_failed=False)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def _feedback():
+    with get_db_connection() as conn:
+        return [json.loads(row[0]) for row in conn.execute("SELECT ai_feedback FROM reflections ORDER BY id")]
+
+
+def test_failed_reflection_is_skipped_and_retried_later(reflections, tmp_path, monkeypatch):
+    calls = []
+
+    def gemini(text):
+        calls.append(text)
+        if text == "fails":
+            raise ValueError("Invalid response format")
+        return {"classification": "hard", "confidence": 0.9, "reasoning": text}
+
+    monkeypatch.setattr(backfill_reflections, "request_reflection_analysis", gemini)
+    args = _args(tmp_path)
+    backfill_reflections.run(args)
+
+    # Retried once, then left unchanged while the rest of the run completes
+    assert calls.count("fails") == 2
+    first, failed, third, fourth = _feedback()
+    assert failed == ORIGINAL
+    for feedback in (first, third, fourth):
+        assert feedback["reflection_analysis"]["classification"] == "hard"
+        assert feedback["code_feedback"] == "Looks good"
+    assert backfill_reflections.load_failed(args.failed_file) == [reflections[1]]
+
+    # --retry-failed goes through the failed reflections only
+    calls.clear()
+    monkeypatch.setattr(backfill_reflections, "request_reflection_analysis",
+                        lambda text: calls.append(text) or {"classification": "easy", "confidence": 0.8})
+    backfill_reflections.run(_args(tmp_path, retry_failed=True))
+    assert calls == ["fails"]
+    assert [f["reflection_analysis"]["classification"] for f in _feedback()] == ["hard", "easy", "hard", "hard"]
+    assert backfill_reflections.load_failed(args.failed_file) == []
+
+
+def test_interrupted_run_keeps_its_failures(reflections, tmp_path, monkeypatch):
+    def gemini(text):
+        if text == "fails":
+            raise ValueError("Invalid response format")
+        if text == "third":
+            raise KeyboardInterrupt
+        return {"classification": "hard", "confidence": 0.9}
+
+    monkeypatch.setattr(backfill_reflections, "request_reflection_analysis", gemini)
+    args = _args(tmp_path, concurrency=1)
+    with pytest.raises(KeyboardInterrupt):
+        backfill_reflections.run(args)
+    assert backfill_reflections.load_checkpoint(args.checkpoint, args) == (reflections[1], [reflections[1]])
+
+    monkeypatch.setattr(backfill_reflections, "request_reflection_analysis",
+                        lambda text: {"classification": "easy", "confidence": 0.8})
+    backfill_reflections.run(args)
+    assert backfill_reflections.load_failed(args.failed_file) == [reflections[1]]
+    assert _feedback()[1] == ORIGINAL
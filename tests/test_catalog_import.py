@@ -0,0 +1,49 @@
+"""iter_courses streams the courses of a catalog file whatever the chunk boundaries."""
+import io
+import json
+
+import pytest
+
+import catalog_import
+
+COURSES = [
+    {"name": f"Course {i}", "videos": [{"title": f"Video {i}.{j}", "url": None} for j in range(i)]}
+    for i in range(1, 6)
+]
+
+
+def _courses(text):
+    return list(catalog_import.iter_courses(io.StringIO(text)))
+
+
+@pytest.fixture(params=[1, 2, 3, 7, 64, 1 << 20])
+def read_size(request, monkeypatch):
+    monkeypatch.setattr(catalog_import, "READ_SIZE", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("document", [
+    COURSES,
+    {"courses": COURSES},
+    {"version": 12, "courses": COURSES, "extra": {"courses": []}},
+    # A nested "courses" key before the top-level one is not the catalog
+    {"meta": {"courses": [{"name": "Not a course"}]}, "tags": ["courses", "[x]"], "courses": COURSES},
+])
+def test_iter_courses(document, read_size):
+    assert _courses(json.dumps(document, indent=2)) == COURSES
+
+
+def test_bracket_in_the_next_chunk(monkeypatch):
+    monkeypatch.setattr(catalog_import, "READ_SIZE", 16)
+    text = '{"courses":' + " " * 40 + json.dumps(COURSES) + "}"
+    assert _courses(text) == COURSES
+
+
+@pytest.mark.parametrize("text", [
+    '{"meta": {"courses": []}}',
+    '{"courses": {"name": "Course 1"}}',
+    '"courses"',
+])
+def test_catalog_without_a_courses_list(text, read_size):
+    with pytest.raises(ValueError):
+        _courses(text)
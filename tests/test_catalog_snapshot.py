@@ -0,0 +1,52 @@
+"""The catalog snapshot matches the database it was built from."""
+import json
+import os
+
+import catalog
+import db
+from catalog import get_catalog, load_catalog
+from catalog_import import import_catalog
+from catalog_snapshot import snapshot_path
+from conftest import ROOT
+
+
+def _import(tmp_path, title):
+    path = tmp_path / f"{title}.json"
+    path.write_text(json.dumps({"courses": [{"name": "Python", "videos": [{"title": title}]}]}))
+    import_catalog(str(path))
+
+
+def _recreate_database(monkeypatch):
+    db.close_all_connections()
+    os.remove(db.DB_PATH)
+    monkeypatch.setattr(db, "_schema_ready", False)
+    db.ensure_schema()
+    # As in a new server process
+    monkeypatch.setattr(catalog, "_catalog", None)
+
+
+def test_recreated_database_at_the_same_version_gets_a_new_snapshot(temp_db, tmp_path, monkeypatch):
+    _import(tmp_path, "Old title")
+    old = get_catalog()
+    assert old.get_challenge_by_level(1, 1).title == "Old title"
+    assert os.path.exists(snapshot_path())
+
+    _recreate_database(monkeypatch)
+    _import(tmp_path, "New title")
+    new = get_catalog()
+    assert new.version == old.version
+    assert new.generation != old.generation
+    assert new.get_challenge_by_level(1, 1).title == "New title"
+
+
+def test_level_count_reads_only_the_index(temp_db):
+    import_catalog(os.path.join(ROOT, "courses.json"))
+    snapshot = get_catalog()
+    with db.get_db_connection() as conn:
+        decoded = load_catalog(conn.cursor(), snapshot.version, snapshot.generation)
+
+    for course in decoded.courses:
+        assert snapshot.get_level_count(course.id) == decoded.get_level_count(course.id) > 0
+    assert snapshot.get_level_count(max(decoded.courses_by_id) + 1) == 0
+    # No challenge payload was decoded
+    assert not snapshot._cache
@@ -0,0 +1,84 @@
+"""Submissions run isolated from each other and within their limits."""
+import threading
+
+import pytest
+
+from code_runner import RunnerPool
+
+SUM_EXERCISE_TESTS = [{"input": [1, 2, 3], "expected": 6}]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = RunnerPool(size=2)
+    yield pool
+    pool.shutdown()
+
+
+def test_runs_test_cases(pool):
+    results = pool.run("def total(x):\n    return sum(x)\n", "total", SUM_EXERCISE_TESTS)
+    assert results == [{"input": [1, 2, 3], "expected": 6, "got": 6, "passed": True}]
+
+
+def test_patched_builtins_do_not_leak_into_later_jobs(pool):
+    attacker = "import builtins\nbuiltins.sum = lambda x: 42\ndef total(x):\n    return 0\n"
+    for _ in range(4):
+        pool.run(attacker, "total", SUM_EXERCISE_TESTS)
+    for _ in range(4):
+        results = pool.run("def total(x):\n    return sum(x)\n", "total", SUM_EXERCISE_TESTS)
+        assert results[0]["passed"], results
+
+
+def test_wall_clock_timeout(pool):
+    results = pool.run("def total(x):\n    while True:\n        pass\n", "total", SUM_EXERCISE_TESTS, timeout=1)
+    assert "error" in results[0]
+    # The pool keeps serving afterwards
+    assert pool.run("def total(x):\n    return sum(x)\n", "total", SUM_EXERCISE_TESTS)[0]["passed"]
+
+
+def test_results_are_never_unpickled(pool, tmp_path):
+    marker = tmp_path / "marker"
+    attacker = f"""
+import sys
+
+class Payload:
+    def __reduce__(self):
+        return (open, ({str(marker)!r}, "w"))
+
+def total(x):
+    frame = sys._getframe()
+    while "conn" not in frame.f_locals:
+        frame = frame.f_back
+    frame.f_locals["conn"].send(Payload())
+    return 0
+"""
+    results = pool.run(attacker, "total", SUM_EXERCISE_TESTS)
+    assert results == [{"input": [1, 2, 3], "error": "Execution returned malformed results"}]
+    assert not marker.exists()
+
+
+def test_forged_results_are_checked_against_the_tests(pool):
+    attacker = """
+import json, sys
+
+def total(x):
+    frame = sys._getframe()
+    while "conn" not in frame.f_locals:
+        frame = frame.f_back
+    frame.f_locals["conn"].send_bytes(json.dumps([{"input": x, "passed": "yes"}]).encode())
+    return 0
+"""
+    results = pool.run(attacker, "total", SUM_EXERCISE_TESTS)
+    assert results == [{"input": [1, 2, 3], "error": "Execution returned malformed results"}]
+
+
+def test_shutdown_during_replacement_raises_no_thread_errors(monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, "excepthook", errors.append)
+    before = set(threading.enumerate())
+    pool = RunnerPool(size=1)
+    pool.run("def total(x):\n    while True:\n        pass\n", "total", SUM_EXERCISE_TESTS, timeout=0.2)
+    pool.shutdown()
+    for thread in set(threading.enumerate()) - before:
+        thread.join(timeout=5)
+    assert errors == []
@@ -0,0 +1,76 @@
+"""Code evaluation jobs record failures as errors and never reuse them."""
+import json
+import os
+
+import pytest
+
+import evaluations
+from catalog import get_catalog
+from catalog_import import import_catalog
+from conftest import ROOT
+
+
+@pytest.fixture
+def exercise(temp_db):
+    import_catalog(os.path.join(ROOT, "courses.json"))
+    challenge = next(c for c in get_catalog().get_course_challenges(1) if c.coding_exercises)
+    return challenge.id, challenge.coding_exercises[0]
+
+
+def _finish(job_id):
+    return "".join(evaluations.stream_code_evaluation(job_id))
+
+
+def test_failed_evaluation_is_an_error_and_is_retried(exercise, monkeypatch):
+    challenge_id, ex = exercise
+
+    def failing(code, exercise, stream=False):
+        yield "Partial "
+        raise RuntimeError("Gemini unavailable")
+
+    monkeypatch.setattr(evaluations, "evaluate_code_with_gemini", failing)
+    job_id = evaluations.submit_code_evaluation(1, challenge_id, ex, "def f(): pass")
+    assert "Gemini unavailable" in _finish(job_id)
+    assert evaluations.get_code_evaluation(job_id).status == "error"
+
+    monkeypatch.setattr(evaluations, "evaluate_code_with_gemini", lambda code, exercise, stream=False: iter(["Looks good"]))
+    retry_id = evaluations.submit_code_evaluation(1, challenge_id, ex, "def f(): pass")
+    assert retry_id != job_id
+    assert _finish(retry_id) == "Looks good"
+    evaluation = evaluations.get_code_evaluation(retry_id)
+    assert (evaluation.status, evaluation.feedback) == ("done", "Looks good")
+    # Successful feedback is reused for identical code
+    assert evaluations.submit_code_evaluation(1, challenge_id, ex, "def f(): pass") == retry_id
+
+
+def test_reflection_saved_while_streaming_gets_the_feedback(exercise, monkeypatch):
+    import threading
+
+    import db
+
+    challenge_id, ex = exercise
+    release = threading.Event()
+
+    def slow(code, exercise, stream=False):
+        yield "Correct. "
+        release.wait(5)
+        yield "Well done."
+
+    monkeypatch.setattr(evaluations, "evaluate_code_with_gemini", slow)
+    job_id = evaluations.submit_code_evaluation(1, challenge_id, ex, "def g(): pass")
+
+    # The page saves the reflection before the stream has finished
+    with db.get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO reflections (user_id, challenge_id, reflection_text, ai_feedback, code_evaluation_id)
+        VALUES (1, ?, 'easy', '{"code_feedback": null, "reflection_analysis": {}}', ?)
+        ''', (challenge_id, job_id))
+        reflection_id = cursor.lastrowid
+        evaluations.fill_reflection_feedback(cursor, job_id)
+
+    release.set()
+    _finish(job_id)
+    with db.get_db_connection() as conn:
+        ai_feedback = conn.execute("SELECT ai_feedback FROM reflections WHERE id = ?", (reflection_id,)).fetchone()[0]
+    assert json.loads(ai_feedback) == {"code_feedback": "Correct. Well done.", "reflection_analysis": {}}
@@ -0,0 +1,43 @@
+"""Feedback is cached only for results that depend on the submission alone."""
+from types import SimpleNamespace
+
+import pytest
+
+import ai
+from code_runner import RUNNER_BUSY_ERROR, TIME_LIMIT_ERROR
+from db import get_db_connection
+from feedback_cache import FEEDBACK_CACHE_TTL_DAYS
+
+EXERCISE = {"title": "Total", "description": "Sum a list", "starter_code": "def total(x):", "test_cases": []}
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    models = SimpleNamespace(generate_content_stream=lambda model, contents: iter([SimpleNamespace(text="Nice")]))
+    monkeypatch.setattr(ai, "get_client", lambda: SimpleNamespace(models=models))
+
+
+def _cached_entries():
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM feedback_cache").fetchone()[0]
+
+
+@pytest.mark.parametrize("error", [RUNNER_BUSY_ERROR, f"{TIME_LIMIT_ERROR} (5s)"])
+def test_runner_errors_are_not_cached(temp_db, gemini, monkeypatch, error):
+    monkeypatch.setattr(ai, "run_test_cases", lambda code, exercise: [{"input": [1], "error": error}])
+    assert "".join(ai.evaluate_code_with_gemini("def total(x): pass", EXERCISE, stream=True)) == "Nice"
+    assert _cached_entries() == 0
+
+
+def test_submission_errors_are_cached(temp_db, gemini, monkeypatch):
+    monkeypatch.setattr(ai, "run_test_cases", lambda code, exercise: [{"input": [1], "error": "division by zero"}])
+    "".join(ai.evaluate_code_with_gemini("def total(x): return 1 / 0", EXERCISE, stream=True))
+    assert _cached_entries() == 1
+
+
+def test_expiry_uses_an_index(temp_db):
+    with get_db_connection() as conn:
+        plan = conn.execute('''
+        EXPLAIN QUERY PLAN DELETE FROM feedback_cache WHERE created_at < datetime('now', ?)
+        ''', (f"-{FEEDBACK_CACHE_TTL_DAYS} days",)).fetchall()
+    assert not any(row[-1].startswith("SCAN") for row in plan), plan
@@ -0,0 +1,44 @@
+"""Cached figures are plain dicts and are keyed on the version read before the data."""
+import plotly.express as px
+from streamlit.testing.v1 import AppTest
+
+import figure_cache
+
+
+def _build(calls, course):
+    def build():
+        calls.append(course)
+        return {"progress": px.bar(x=[course], y=[1])}
+    return build
+
+
+def test_hit_returns_dicts_without_rebuilding(temp_db):
+    calls = []
+    first = figure_cache.get_cached_figures(1, 3, _build(calls, "Python"))
+    second = figure_cache.get_cached_figures(1, 3, _build(calls, "SQL"))
+    assert calls == ["Python"]
+    assert isinstance(second["progress"], dict)
+    assert second == first
+    assert second["progress"]["data"][0]["x"] == ["Python"]
+
+
+def test_new_version_rebuilds(temp_db):
+    calls = []
+    figure_cache.get_cached_figures(2, 1, _build(calls, "Python"))
+    figures = figure_cache.get_cached_figures(2, 2, _build(calls, "SQL"))
+    assert calls == ["Python", "SQL"]
+    assert figures["progress"]["data"][0]["x"] == ["SQL"]
+
+
+def test_plotly_chart_accepts_cached_dicts():
+    def app():
+        import plotly.express as px
+        import streamlit as st
+
+        import json
+
+        st.plotly_chart(json.loads(px.bar(x=["Python"], y=[1]).to_json()))
+
+    at = AppTest.from_function(app)
+    at.run()
+    assert not at.exception
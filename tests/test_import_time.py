@@ -0,0 +1,67 @@
+"""Importing the app stays cheap: heavy dependencies load on first use."""
+import ast
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+# Cumulative import time of the app's own modules, after Streamlit and the
+# other third-party packages main.py needs at startup are already loaded
+APP_IMPORT_BUDGET_SECONDS = 0.25
+HEAVY_MODULES = ("pandas", "plotly", "google.genai", "streamlit_ace")
+
+
+def _app_modules():
+    return sorted(
+        name[:-3] for name in os.listdir(ROOT)
+        if name.endswith(".py") and name != "main.py"
+    )
+
+
+def _main_third_party_imports(app_modules):
+    # main.py runs the app when imported, so load what it imports at the top instead
+    with open(os.path.join(ROOT, "main.py")) as f:
+        tree = ast.parse(f.read())
+    names = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names.add(node.module)
+    return sorted(name for name in names if name.split(".")[0] not in app_modules)
+
+
+def _import_in_subprocess():
+    app_modules = _app_modules()
+    script = "\n".join(
+        [f"import {name}" for name in _main_third_party_imports(app_modules)]
+        # The server loads secrets at startup, before running the app
+        + ["import json, sys, streamlit",
+           "streamlit.secrets.load_if_toml_exists()",
+           f"preloaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]"]
+        + [f"import {name}" for name in app_modules]
+        # Some Streamlit versions import plotly themselves; only count what the app adds
+        + [f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules and m not in preloaded]))"]
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=ROOT, capture_output=True, text=True, timeout=120, check=True
+    )
+
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Top-level imports only, as nested ones are already in their parent's total
+        if not name[1:].startswith(" ") and name.strip() in app_modules:
+            cumulative_us += int(cumulative)
+    return cumulative_us / 1e6, json.loads(result.stdout.splitlines()[-1])
+
+
+def test_app_imports_skip_heavy_modules_and_fit_the_budget():
+    seconds, heavy = _import_in_subprocess()
+    assert heavy == []
+    assert seconds < APP_IMPORT_BUDGET_SECONDS
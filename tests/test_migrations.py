@@ -0,0 +1,67 @@
+"""Migrations are frozen and build the same derived tables as the live code."""
+import ast
+import datetime
+import os
+import random
+
+import db
+from activity import recompute_streaks
+from conftest import ROOT
+from migrations import MIGRATIONS
+from rollups import rebuild_rollups
+
+APP_MODULES = {os.path.splitext(name)[0] for name in os.listdir(ROOT) if name.endswith(".py")}
+
+
+def test_migrations_import_no_application_modules():
+    with open(os.path.join(ROOT, "migrations.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imported.add(node.module.split(".")[0])
+    assert not imported & APP_MODULES
+
+
+def test_backfills_match_live_code(tmp_path, monkeypatch):
+    db.close_all_connections()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "focusmate.db"))
+    stop = [m.__name__ for m in MIGRATIONS].index("add_daily_activity")
+    with db.get_db_connection() as conn:
+        conn.execute("BEGIN")
+        for migration in MIGRATIONS[:stop]:
+            migration(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {stop}")
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO courses (name) VALUES ('Python')")
+        cursor.execute("INSERT INTO challenges (course_id, level, title) VALUES (1, 1, 'Intro')")
+        rng = random.Random(7)
+        start = datetime.date(2024, 1, 1)
+        for user_id in range(1, 6):
+            for _ in range(40):
+                day = (start + datetime.timedelta(days=rng.randrange(60))).isoformat()
+                cursor.execute('''
+                INSERT INTO study_sessions (user_id, session_type, duration_minutes, duration_seconds, completed, created_at)
+                VALUES (?, ?, 25, 1500, ?, ?)
+                ''', (user_id, rng.choice(["Work", "Break"]), rng.randint(0, 1), f"{day} 10:00:00"))
+                cursor.execute('''
+                INSERT INTO quiz_attempts (user_id, challenge_id, score, completed_at) VALUES (?, 1, ?, ?)
+                ''', (user_id, rng.randint(0, 100), f"{day} 11:00:00"))
+    conn = db._open_connection()
+    db.migrate(conn)
+    conn.close()
+
+    with db.get_db_connection() as conn:
+        cursor = conn.cursor()
+        tables = ("user_streaks", "daily_quiz_rollups", "daily_study_rollups")
+        migrated = {t: cursor.execute(f"SELECT * FROM {t} ORDER BY 1, 2, 3").fetchall() for t in tables}
+        for user_id in range(1, 6):
+            recompute_streaks(cursor, user_id)
+        rebuild_rollups(cursor)
+        live = {t: cursor.execute(f"SELECT * FROM {t} ORDER BY 1, 2, 3").fetchall() for t in tables}
+        conn.rollback()
+    db.close_all_connections()
+    assert migrated["user_streaks"] and migrated["daily_study_rollups"]
+    assert migrated == live
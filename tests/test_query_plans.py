@@ -0,0 +1,96 @@
+"""Every query the pages run must be answered from an index, never a table scan."""
+import ast
+import os
+import sqlite3
+
+import pytest
+
+from conftest import ROOT
+
+# Modules holding the statements run while serving pages
+QUERY_MODULES = [
+    "main.py", "progress.py", "rollups.py", "timer_log.py", "evaluations.py", "activity.py",
+    "feedback_cache.py", "figure_cache.py", "reflection_classifier.py", "catalog.py",
+]
+
+# Scans that are intended: (module, text of the statement) -> why
+ALLOWED_SCANS = {
+    ("catalog.py", "FROM courses ORDER BY id"):
+        "load_catalog reads the whole catalog once per catalog version to build the snapshot",
+    ("catalog.py", "FROM challenges ORDER BY course_id, level"):
+        "load_catalog reads the whole catalog once per catalog version to build the snapshot",
+    ("catalog.py", "FROM code_snippets ORDER BY"):
+        "load_catalog reads the whole catalog once per catalog version to build the snapshot",
+    ("catalog.py", "FROM questions ORDER BY"):
+        "load_catalog reads the whole catalog once per catalog version to build the snapshot",
+    ("catalog.py", "FROM test_cases ORDER BY"):
+        "load_catalog reads the whole catalog once per catalog version to build the snapshot",
+    ("catalog.py", "FROM coding_exercises ORDER BY"):
+        "load_catalog reads the whole catalog once per catalog version to build the snapshot",
+    ("feedback_cache.py", "ORDER BY last_used_at DESC LIMIT -1 OFFSET ?"):
+        "LRU eviction walks the last_used_at index, at most FEEDBACK_CACHE_MAX_ENTRIES rows, once per Gemini call",
+    ("feedback_cache.py", "SELECT COUNT(*) FROM feedback_cache"):
+        "only the command-line stats report counts the entries",
+}
+
+
+def _allowed_scan(module, sql):
+    sql = " ".join(sql.split())
+    return next((reason for (allowed_module, text), reason in ALLOWED_SCANS.items()
+                 if allowed_module == module and text in sql), None)
+
+
+def _statements():
+    for module in QUERY_MODULES:
+        with open(os.path.join(ROOT, module), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in ("execute", "executemany") and node.args
+                    and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+                sql = node.args[0].value
+                if not sql.lstrip().upper().startswith("PRAGMA"):
+                    yield pytest.param(module, sql, id=f"{module}:{node.lineno}")
+
+
+@pytest.fixture(scope="module")
+def seeded_db(tmp_path_factory):
+    import db
+    from catalog_import import import_catalog
+
+    db.close_all_connections()
+    old_path, old_ready = db.DB_PATH, db._schema_ready
+    db.DB_PATH = str(tmp_path_factory.mktemp("plans") / "focusmate.db")
+    db._schema_ready = False
+    try:
+        db.ensure_schema()
+        import_catalog(os.path.join(ROOT, "courses.json"))
+        with db.get_db_connection() as conn:
+            conn.execute("INSERT INTO users (name, email, experience_level) VALUES ('Ada', 'ada@example.com', 'Beginner')")
+            conn.execute("INSERT INTO user_progress (user_id, course_id, progress_percentage, overall_score, status) VALUES (1, 1, 10, 50, 'In Progress')")
+        conn = sqlite3.connect(db.DB_PATH)
+        yield conn
+        conn.close()
+    finally:
+        db.close_all_connections()
+        db.DB_PATH, db._schema_ready = old_path, old_ready
+
+
+def test_statements_found():
+    assert len(list(_statements())) > 30
+
+
+def test_allowed_scans_match_a_statement():
+    statements = [param.values for param in _statements()]
+    for module, text in ALLOWED_SCANS:
+        assert any(_allowed_scan(module, sql) for statement_module, sql in statements
+                   if statement_module == module and text in " ".join(sql.split())), (module, text)
+
+
+@pytest.mark.parametrize("module, sql", list(_statements()))
+def test_no_table_scans(seeded_db, module, sql):
+    if _allowed_scan(module, sql):
+        return
+    plan = seeded_db.execute("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("?")).fetchall()
+    scans = [row[3] for row in plan if row[3].startswith("SCAN")]
+    assert not scans, f"{' '.join(sql.split())}\n{scans}"
@@ -0,0 +1,34 @@
+"""The stylesheet is sent on a session's first run only."""
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+
+CSS_MARKERS = ("<style", "focusmate.css")
+
+
+def _delta_bytes(at):
+    """Bytes of markdown and of CSS sent to the browser by the last run."""
+    elements = list(at.get("markdown")) + list(at.get("iframe"))
+    markdown = sum(len(element.proto.body.encode("utf-8")) for element in at.get("markdown"))
+    css = sum(
+        len(str(element.proto).encode("utf-8")) for element in elements
+        if any(marker in str(element.proto) for marker in CSS_MARKERS)
+    )
+    return markdown, css
+
+
+def test_rerun_sends_no_css(temp_db):
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=60)
+    at.run()
+    assert not at.exception
+    first_markdown, first_css = _delta_bytes(at)
+
+    at.run()
+    assert not at.exception
+    second_markdown, second_css = _delta_bytes(at)
+
+    assert first_css > 0
+    assert second_css == 0
+    assert second_markdown <= first_markdown
@@ -0,0 +1,23 @@
+"""Pomodoro countdown that runs in the browser.
+
+The page used to rerun every second to redraw the timer. The countdown now
+ticks inside the component's iframe and only reports back when it reaches
+zero, which reruns the page once so the session bookkeeping can run.
+"""
+import os
+
+import streamlit.components.v1 as components
+
+_COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "pomodoro_timer")
+_pomodoro_timer = components.declare_component("pomodoro_timer", path=_COMPONENT_DIR)
+
+
+def pomodoro_countdown(label, remaining_seconds, elapsed_seconds, key=None):
+    """Show a running countdown and return the last event it sent, if any."""
+    return _pomodoro_timer(
+        label=label,
+        remaining=remaining_seconds,
+        elapsed=elapsed_seconds,
+        key=key,
+        default=None
+    )
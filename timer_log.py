@@ -0,0 +1,93 @@
+"""Append-only log of Pomodoro timer events.
+
+Every start, pause, resume, switch, reset and complete is stored in
+timer_events with its timestamp. When an event ends a running interval, the
+interval's length in seconds is added to the session's duration_seconds, so
+durations stay current without replaying the log. The last event of a user
+is enough to rebuild a running or paused timer after a reconnect.
+"""
+import time
+from collections import namedtuple
+
+from activity import record_activity
+from db import get_db_connection
+from rollups import add_study_seconds, add_study_session
+
+# Events after which the timer is counting
+RUNNING_EVENTS = ("start", "resume")
+# Events that close the study session
+CLOSING_EVENTS = ("switch", "reset", "complete")
+
+TimerState = namedtuple("TimerState", ["session_id", "mode", "running", "elapsed_seconds", "occurred_at"])
+
+
+def record_timer_event(user_id, session_id, event, mode, elapsed_seconds=0):
+    """Append an event and fold the interval it ends into the session duration.
+
+    ``elapsed_seconds`` is the time already counted in this mode before the
+    event, which is what the countdown resumes from.
+    """
+    now = time.time()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT event, elapsed_seconds, occurred_at FROM timer_events
+        WHERE session_id = ?
+        ORDER BY id DESC LIMIT 1
+        ''', (session_id,))
+        previous = cursor.fetchone()
+
+        seconds = 0
+        if previous and previous[0] in RUNNING_EVENTS:
+            seconds = now - previous[2]
+            if event == "complete":
+                # A countdown finished while nobody had the page open only counts up to its length
+                seconds = min(seconds, max(0, elapsed_seconds - previous[1]))
+        cursor.execute('''
+        UPDATE study_sessions
+        SET duration_seconds = duration_seconds + ?,
+            duration_minutes = CAST((duration_seconds + ?) / 60 AS INTEGER),
+            completed = completed OR ?
+        WHERE id = ?
+        ''', (seconds, seconds, event in CLOSING_EVENTS, session_id))
+        if seconds:
+            add_study_seconds(cursor, session_id, seconds)
+
+        cursor.execute('''
+        INSERT INTO timer_events (user_id, session_id, event, mode, elapsed_seconds, occurred_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, session_id, event, mode, elapsed_seconds, now))
+        # A closed session makes today an active day for the streak
+        if event in CLOSING_EVENTS:
+            record_activity(cursor, user_id)
+    return now
+
+
+def start_session(user_id, mode, elapsed_seconds=0):
+    """Create a study session for mode, log its start and return the session id."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO study_sessions (user_id, session_type, duration_minutes, completed)
+        VALUES (?, ?, ?, ?)
+        ''', (user_id, mode, 0, False))
+        session_id = cursor.lastrowid
+        add_study_session(cursor, session_id)
+        record_timer_event(user_id, session_id, "start", mode, elapsed_seconds)
+    return session_id
+
+
+def load_timer_state(user_id):
+    """The user's running or paused timer, or None if no session is open."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT session_id, event, mode, elapsed_seconds, occurred_at FROM timer_events
+        WHERE user_id = ?
+        ORDER BY id DESC LIMIT 1
+        ''', (user_id,))
+        row = cursor.fetchone()
+    if row is None or row[1] in CLOSING_EVENTS:
+        return None
+    session_id, event, mode, elapsed_seconds, occurred_at = row
+    return TimerState(session_id, mode, event in RUNNING_EVENTS, elapsed_seconds, occurred_at)